@@ -1,5 +1,7 @@
 from analysis.baseline import BaselineCalculator
 from analysis.spike_detector import SpikeDetector
+from analysis.online_detector import OnlineSpikeDetector
+from analysis.engine import DetectionEngine, HourlyMatrix
 from analysis.severity import calculate_severity
 
-__all__ = ["BaselineCalculator", "SpikeDetector", "calculate_severity"]
+__all__ = ["BaselineCalculator", "SpikeDetector", "OnlineSpikeDetector", "DetectionEngine", "HourlyMatrix", "calculate_severity"]
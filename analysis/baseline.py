@@ -1,81 +1,171 @@
 import logging
 from datetime import datetime, timedelta
 
-from sqlalchemy import select, func
+from sqlalchemy import case, select, func
 
 from config import config
 from database.connection import async_session
-from database.models import Post, Channel
+from database.models import Channel, PostHourlyRollup as Rollup
+from database.rollups import hour_bucket, rollup_average
 
 logger = logging.getLogger(__name__)
 
 
 class BaselineCalculator:
+    """Toxicity baselines and current averages, read from post_hourly_rollups.
+
+    Windows are whole hours: a window of N hours covers the current hour
+    and the N hours before it.
+    """
+
     def __init__(self, days: int = None):
         self.days = days or config.BASELINE_DAYS
 
-    async def calculate_channel_baseline(self, channel_id: int, days: int = None) -> float | None:
-        days = days or self.days
-        cutoff = datetime.utcnow() - timedelta(days=days)
+    @staticmethod
+    def _window_start(**delta) -> datetime:
+        return hour_bucket(datetime.utcnow() - timedelta(**delta))
 
+    async def _average(self, query) -> float | None:
         async with async_session() as session:
-            result = await session.execute(
-                select(func.avg(Post.toxicity_score))
-                .where(Post.channel_id == channel_id)
-                .where(Post.posted_at >= cutoff)
-                .where(Post.toxicity_score.isnot(None))
-            )
+            result = await session.execute(query)
             avg = result.scalar()
             return float(avg) if avg else None
 
-    async def calculate_country_baseline(self, country: str, days: int = None) -> float | None:
-        days = days or self.days
-        cutoff = datetime.utcnow() - timedelta(days=days)
+    async def calculate_channel_baseline(self, channel_id: int, days: int = None) -> float | None:
+        cutoff = self._window_start(days=days or self.days)
+        return await self._average(
+            select(rollup_average())
+            .where(Rollup.channel_id == channel_id)
+            .where(Rollup.hour >= cutoff)
+        )
 
-        async with async_session() as session:
-            result = await session.execute(
-                select(func.avg(Post.toxicity_score))
-                .select_from(Post)
-                .join(Channel)
-                .where(Channel.country == country)
-                .where(Post.posted_at >= cutoff)
-                .where(Post.toxicity_score.isnot(None))
-            )
-            avg = result.scalar()
-            return float(avg) if avg else None
+    async def calculate_country_baseline(self, country: str, days: int = None) -> float | None:
+        cutoff = self._window_start(days=days or self.days)
+        return await self._average(
+            select(rollup_average())
+            .join(Channel, Channel.id == Rollup.channel_id)
+            .where(Channel.country == country)
+            .where(Rollup.hour >= cutoff)
+        )
 
     async def calculate_global_baseline(self, days: int = None) -> float | None:
-        days = days or self.days
-        cutoff = datetime.utcnow() - timedelta(days=days)
-
-        async with async_session() as session:
-            result = await session.execute(
-                select(func.avg(Post.toxicity_score))
-                .where(Post.posted_at >= cutoff)
-                .where(Post.toxicity_score.isnot(None))
-            )
-            avg = result.scalar()
-            return float(avg) if avg else None
+        cutoff = self._window_start(days=days or self.days)
+        return await self._average(
+            select(rollup_average()).where(Rollup.hour >= cutoff)
+        )
 
     async def get_current_average(self, channel_id: int = None, country: str = None, hours: int = 24) -> tuple[float | None, int]:
-        cutoff = datetime.utcnow() - timedelta(hours=hours)
+        cutoff = self._window_start(hours=hours)
 
         async with async_session() as session:
             query = select(
-                func.avg(Post.toxicity_score),
-                func.count(Post.id)
+                rollup_average(),
+                func.coalesce(func.sum(Rollup.toxicity_count), 0)
             ).where(
-                Post.posted_at >= cutoff
-            ).where(
-                Post.toxicity_score.isnot(None)
+                Rollup.hour >= cutoff
             )
 
             if channel_id:
-                query = query.where(Post.channel_id == channel_id)
+                query = query.where(Rollup.channel_id == channel_id)
             elif country:
-                query = query.select_from(Post).join(Channel).where(Channel.country == country)
+                query = query.join(Channel, Channel.id == Rollup.channel_id).where(Channel.country == country)
 
             result = await session.execute(query)
-            row = result.one()
-            avg, count = row
+            avg, count = result.one()
             return (float(avg) if avg else None, count)
+
+    async def get_current_averages(
+        self,
+        channel_ids: list[int] = (),
+        countries: list[str] = (),
+        hours: int = 24
+    ) -> tuple[dict[int, float | None], dict[str, float | None]]:
+        """Current averages of several channels and countries, one grouped query per scope."""
+        cutoff = self._window_start(hours=hours)
+        by_channel, by_country = {}, {}
+
+        async with async_session() as session:
+            if channel_ids:
+                result = await session.execute(
+                    select(Rollup.channel_id, rollup_average())
+                    .where(Rollup.channel_id.in_(channel_ids))
+                    .where(Rollup.hour >= cutoff)
+                    .group_by(Rollup.channel_id)
+                )
+                by_channel = {channel_id: float(avg) if avg else None for channel_id, avg in result.all()}
+
+            if countries:
+                result = await session.execute(
+                    select(Channel.country, rollup_average())
+                    .select_from(Rollup)
+                    .join(Channel, Channel.id == Rollup.channel_id)
+                    .where(Channel.country.in_(countries))
+                    .where(Rollup.hour >= cutoff)
+                    .group_by(Channel.country)
+                )
+                by_country = {country: float(avg) if avg else None for country, avg in result.all()}
+
+        return by_channel, by_country
+
+    def _window_aggregates(self, hours: int):
+        # Baseline and current-window aggregates computed side by side, so
+        # one pass over the rollups serves every group.
+        baseline_cutoff = self._window_start(days=self.days)
+        current_cutoff = self._window_start(hours=hours)
+
+        return (
+            rollup_average(baseline_cutoff).label("baseline"),
+            rollup_average(current_cutoff).label("current_avg"),
+            func.sum(case((Rollup.hour >= current_cutoff, Rollup.toxicity_count), else_=0)).label("post_count"),
+        ), min(baseline_cutoff, current_cutoff)
+
+    async def get_channel_windows(self, hours: int = 24) -> list[dict]:
+        """Baseline and current average of every active channel, in one query."""
+        aggregates, cutoff = self._window_aggregates(hours)
+
+        async with async_session() as session:
+            result = await session.execute(
+                select(Channel.id, Channel.username, Channel.country, *aggregates)
+                .join(Rollup, Rollup.channel_id == Channel.id)
+                .where(Channel.is_active == True)
+                .where(Rollup.hour >= cutoff)
+                .group_by(Channel.id, Channel.username, Channel.country)
+            )
+            rows = result.all()
+
+        return [
+            {
+                "channel_id": row.id,
+                "channel_username": row.username,
+                "country": row.country,
+                "baseline": float(row.baseline) if row.baseline else None,
+                "current_avg": float(row.current_avg) if row.current_avg else None,
+                "post_count": row.post_count
+            }
+            for row in rows
+        ]
+
+    async def get_country_windows(self, hours: int = 24) -> list[dict]:
+        """Baseline and current average of every country, in one query."""
+        aggregates, cutoff = self._window_aggregates(hours)
+
+        async with async_session() as session:
+            result = await session.execute(
+                select(Channel.country, *aggregates)
+                .select_from(Rollup)
+                .join(Channel, Channel.id == Rollup.channel_id)
+                .where(Channel.country.isnot(None))
+                .where(Rollup.hour >= cutoff)
+                .group_by(Channel.country)
+            )
+            rows = result.all()
+
+        return [
+            {
+                "country": row.country,
+                "baseline": float(row.baseline) if row.baseline else None,
+                "current_avg": float(row.current_avg) if row.current_avg else None,
+                "post_count": row.post_count
+            }
+            for row in rows
+        ]
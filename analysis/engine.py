@@ -0,0 +1,219 @@
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from config import config
+from database.connection import async_session
+from database.models import Channel, PostHourlyRollup as Rollup
+from database.rollups import hour_bucket
+from analysis.spike_detector import CHANNEL_MIN_POSTS
+
+logger = logging.getLogger(__name__)
+
+DETECTORS = ["ratio", "zscore", "cusum", "seasonal"]
+
+HOURS_PER_WEEK = 7 * 24
+
+
+class HourlyMatrix:
+    """Toxicity count, sum and sum of squares per channel (rows) and hour (columns)."""
+
+    def __init__(self, channel_ids: np.ndarray, start: datetime, count: np.ndarray, total: np.ndarray, sumsq: np.ndarray):
+        self.channel_ids = channel_ids
+        self.start = start
+        self.count = count
+        self.total = total
+        self.sumsq = sumsq
+
+    @property
+    def hours(self) -> int:
+        return self.count.shape[1]
+
+    def hour(self, column: int) -> datetime:
+        return self.start + timedelta(hours=int(column))
+
+    @classmethod
+    async def load(cls, hours: int, end: datetime = None) -> "HourlyMatrix":
+        """Rollups of active channels for the ``hours`` hours up to and including ``end``'s hour."""
+        end = hour_bucket(end or datetime.utcnow())
+        start = end - timedelta(hours=hours - 1)
+
+        async with async_session() as session:
+            result = await session.execute(
+                select(Rollup.channel_id, Rollup.hour, Rollup.toxicity_count, Rollup.toxicity_sum, Rollup.toxicity_sumsq)
+                .join(Channel, Channel.id == Rollup.channel_id)
+                .where(Channel.is_active == True)
+                .where(Rollup.hour >= start)
+                .where(Rollup.hour <= end)
+                .where(Rollup.toxicity_count > 0)
+            )
+            rows = result.all()
+
+        if not rows:
+            empty = np.zeros((0, hours))
+            return cls(np.zeros(0, dtype=np.int64), start, empty, empty.copy(), empty.copy())
+
+        channels, hour_values, counts, totals, squares = zip(*rows)
+        channel_ids, row_index = np.unique(np.array(channels, dtype=np.int64), return_inverse=True)
+        column_index = np.array([(hour - start) // timedelta(hours=1) for hour in hour_values])
+
+        matrices = []
+        for values in (counts, totals, squares):
+            matrix = np.zeros((len(channel_ids), hours))
+            matrix[row_index, column_index] = values
+            matrices.append(matrix)
+
+        return cls(channel_ids, start, *matrices)
+
+
+class DetectionEngine:
+    """Vectorized spike detectors over an HourlyMatrix.
+
+    Every detector looks at the window of the last ``lookback_hours`` hours
+    ending at an hour, for each channel and each of the last ``scan_hours``
+    hours at once:
+
+    - ratio: window average at least ``threshold`` times the baseline
+      average, the test SpikeDetector applies
+    - zscore: window average too many standard errors above the baseline
+    - cusum: upper CUSUM of the hourly averages within the window, against
+      the baseline, exceeds its decision interval
+    - seasonal: window average at least ``threshold`` times the average of
+      the same hours of the week over the previous ``seasonal_weeks`` weeks
+
+    Windows and baselines cover whole hours, as in BaselineCalculator.
+    """
+
+    def __init__(
+        self,
+        detectors: list[str] = None,
+        threshold: float = None,
+        lookback_hours: int = 24,
+        days: int = None,
+        min_posts: int = CHANNEL_MIN_POSTS
+    ):
+        unknown = set(detectors or []) - set(DETECTORS)
+        if unknown:
+            raise ValueError(f"Unknown detectors: {', '.join(sorted(unknown))}")
+
+        self.detectors = detectors or DETECTORS
+        self.threshold = threshold or config.SPIKE_THRESHOLD
+        self.min_posts = min_posts
+        self.zscore_threshold = config.SPIKE_ZSCORE_THRESHOLD
+        self.cusum_threshold = config.SPIKE_CUSUM_THRESHOLD
+        self.cusum_drift = config.SPIKE_CUSUM_DRIFT
+        self.seasonal_weeks = config.SPIKE_SEASONAL_WEEKS
+
+        # Columns per window, counting the current hour like BaselineCalculator
+        self.window = lookback_hours + 1
+        self.baseline = (days or config.BASELINE_DAYS) * 24 + 1
+
+    def hours_needed(self, scan_hours: int = 1) -> int:
+        span = self.baseline
+        if "seasonal" in self.detectors:
+            span = max(span, self.seasonal_weeks * HOURS_PER_WEEK + self.window)
+        return span + scan_hours - 1
+
+    async def run(self, scan_hours: int = 1) -> list[dict]:
+        matrix = await HourlyMatrix.load(self.hours_needed(scan_hours))
+        return self.evaluate(matrix, scan_hours)
+
+    @staticmethod
+    def _window_sums(matrix: np.ndarray, ends: np.ndarray, length: int) -> np.ndarray:
+        # Sums over the ``length`` columns ending at (and including) each end
+        cumulative = np.concatenate([np.zeros((matrix.shape[0], 1)), np.cumsum(matrix, axis=1)], axis=1)
+        return cumulative[:, ends + 1] - cumulative[:, np.maximum(ends + 1 - length, 0)]
+
+    def evaluate(self, matrix: HourlyMatrix, scan_hours: int = 1) -> list[dict]:
+        """Flag every (channel, window, detector) in the last ``scan_hours`` windows of the matrix."""
+        ends = np.arange(max(matrix.hours - scan_hours, 0), matrix.hours)
+
+        current = {
+            name: self._window_sums(values, ends, self.window)
+            for name, values in (("count", matrix.count), ("total", matrix.total), ("sumsq", matrix.sumsq))
+        }
+        baseline = {
+            name: self._window_sums(values, ends, self.baseline)
+            for name, values in (("count", matrix.count), ("total", matrix.total), ("sumsq", matrix.sumsq))
+        }
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            current_avg = current["total"] / current["count"]
+            baseline_avg = baseline["total"] / baseline["count"]
+            baseline_std = np.sqrt(np.maximum(baseline["sumsq"] / baseline["count"] - baseline_avg ** 2, 0))
+
+            enough = current["count"] >= self.min_posts
+            results = {}
+
+            if "ratio" in self.detectors:
+                ratio = current_avg / baseline_avg
+                results["ratio"] = (enough & (baseline_avg > 0) & (ratio >= self.threshold), ratio, baseline_avg)
+
+            if "zscore" in self.detectors:
+                zscore = (current_avg - baseline_avg) / (baseline_std / np.sqrt(current["count"]))
+                flagged = enough & (baseline["count"] >= 2) & (baseline_std > 0) & (zscore >= self.zscore_threshold)
+                results["zscore"] = (flagged, zscore, baseline_avg)
+
+            if "cusum" in self.detectors:
+                cusum = self._cusum(matrix, ends, baseline_avg, baseline_std)
+                flagged = enough & (baseline_std > 0) & (cusum >= self.cusum_threshold)
+                results["cusum"] = (flagged, cusum, baseline_avg)
+
+            if "seasonal" in self.detectors:
+                seasonal_count = np.zeros_like(current["count"])
+                seasonal_total = np.zeros_like(current["total"])
+                for week in range(1, self.seasonal_weeks + 1):
+                    shifted = ends - week * HOURS_PER_WEEK
+                    # Weeks before the start of the matrix add nothing
+                    valid = shifted >= self.window - 1
+                    seasonal_count[:, valid] += self._window_sums(matrix.count, shifted[valid], self.window)
+                    seasonal_total[:, valid] += self._window_sums(matrix.total, shifted[valid], self.window)
+                seasonal_avg = seasonal_total / seasonal_count
+                ratio = current_avg / seasonal_avg
+                flagged = enough & (seasonal_count >= self.min_posts) & (seasonal_avg > 0) & (ratio >= self.threshold)
+                results["seasonal"] = (flagged, ratio, seasonal_avg)
+
+        flagged = []
+        for detector, (flags, scores, references) in results.items():
+            for row, column in zip(*np.nonzero(flags)):
+                end = ends[column]
+                flagged.append({
+                    "channel_id": int(matrix.channel_ids[row]),
+                    "detector": detector,
+                    "window_start": matrix.hour(end - self.window + 1),
+                    "window_end": matrix.hour(end + 1),
+                    "score": float(scores[row, column]),
+                    "current_avg": float(current_avg[row, column]),
+                    "baseline": float(references[row, column]),
+                    "post_count": int(current["count"][row, column])
+                })
+
+        logger.info(
+            f"Evaluated {len(self.detectors)} detectors over {len(matrix.channel_ids)} channels "
+            f"x {len(ends)} windows: {len(flagged)} flagged"
+        )
+        return flagged
+
+    def _cusum(self, matrix: HourlyMatrix, ends: np.ndarray, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+        # Highest upper CUSUM reached within each window. Each hour adds the
+        # standard score of its average against the baseline, less the drift;
+        # hours without scored posts add nothing.
+        statistic = np.zeros((matrix.count.shape[0], len(ends)))
+        highest = np.zeros_like(statistic)
+
+        for offset in range(self.window - 1, -1, -1):
+            columns = ends - offset
+            valid = columns >= 0
+            count = np.where(valid, matrix.count[:, np.maximum(columns, 0)], 0)
+            total = np.where(valid, matrix.total[:, np.maximum(columns, 0)], 0)
+
+            scored = count > 0
+            step = (total / np.where(scored, count, 1) - mean) / (std / np.sqrt(np.where(scored, count, 1)))
+            step = np.where(scored & (std > 0), step - self.cusum_drift, 0)
+
+            statistic = np.maximum(statistic + np.nan_to_num(step), 0)
+            highest = np.maximum(highest, statistic)
+
+        return highest
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from config import config
+from database.connection import async_session
+from database.models import Channel, PostHourlyRollup as Rollup, Spike
+from analysis.spike_detector import CHANNEL_MIN_POSTS, COUNTRY_MIN_POSTS, SpikeDetector
+
+logger = logging.getLogger(__name__)
+
+
+class WindowState:
+    """Hourly toxicity count and sum of one channel or country."""
+
+    def __init__(self):
+        self.hours: dict[datetime, list] = {}
+
+    def add(self, hour: datetime, count: int, total: float):
+        bucket = self.hours.setdefault(hour, [0, 0.0])
+        bucket[0] += count
+        bucket[1] += total
+
+    def prune(self, cutoff: datetime):
+        for hour in [hour for hour in self.hours if hour < cutoff]:
+            del self.hours[hour]
+
+    def window(self, baseline_cutoff: datetime, current_cutoff: datetime) -> dict:
+        baseline_count = current_count = 0
+        baseline_sum = current_sum = 0.0
+        for hour, (count, total) in self.hours.items():
+            if hour >= baseline_cutoff:
+                baseline_count += count
+                baseline_sum += total
+            if hour >= current_cutoff:
+                current_count += count
+                current_sum += total
+
+        return {
+            "baseline": baseline_sum / baseline_count if baseline_count else None,
+            "current_avg": current_sum / current_count if current_count else None,
+            "post_count": current_count
+        }
+
+
+class OnlineSpikeDetector(SpikeDetector):
+    """Spike detection kept up to date with every batch of scores.
+
+    The hourly toxicity counts and sums of each channel and country over the
+    baseline window are held in memory and fed the rollup deltas the
+    pipeline commits, so spikes open and close as soon as a window crosses
+    the threshold. Windows and thresholds are the same as the batch
+    detector's.
+
+    The rollups are the persisted state: sync() reloads it from them, which
+    also picks up scores written by other workers and rolls the windows
+    forward when no scores arrive.
+    """
+
+    def __init__(self, threshold: float = None, lookback_hours: int = 24, sync_seconds: int = None):
+        super().__init__(threshold, lookback_hours)
+        self.sync_seconds = sync_seconds or config.SPIKE_STREAM_SYNC_SECONDS
+
+        self.channels: dict[int, Channel] = {}
+        # ("channel", id) or ("country", name) -> state
+        self.states: dict[tuple, WindowState] = {}
+        # Same keys -> (spike id, baseline_avg) of the open spike
+        self.active: dict[tuple, tuple[int, float | None]] = {}
+
+        self._synced = False
+        self._lock = asyncio.Lock()
+
+    def _cutoffs(self) -> tuple[datetime, datetime]:
+        return (
+            self.baseline_calc._window_start(days=self.baseline_calc.days),
+            self.baseline_calc._window_start(hours=self.lookback_hours)
+        )
+
+    def _keys(self, channel_id: int) -> list[tuple]:
+        keys = [("channel", channel_id)]
+        channel = self.channels.get(channel_id)
+        if channel is not None and channel.country:
+            keys.append(("country", channel.country))
+        return keys
+
+    async def _load_channels(self, session, ids: set[int] = None):
+        query = select(Channel)
+        if ids is not None:
+            query = query.where(Channel.id.in_(ids))
+        result = await session.execute(query)
+        for channel in result.scalars().all():
+            self.channels[channel.id] = channel
+
+    async def sync(self):
+        """Rebuild the in-memory state from the rollups and active spikes."""
+        async with self._lock:
+            cutoff = min(self._cutoffs())
+
+            async with async_session() as session:
+                await self._load_channels(session)
+                rollups = await session.execute(
+                    select(Rollup.channel_id, Rollup.hour, Rollup.toxicity_count, Rollup.toxicity_sum)
+                    .where(Rollup.hour >= cutoff)
+                    .where(Rollup.toxicity_count > 0)
+                )
+                spikes = await session.execute(
+                    select(Spike.id, Spike.channel_id, Spike.country, Spike.baseline_avg)
+                    .where(Spike.is_active == True)
+                )
+                rows, active = rollups.all(), spikes.all()
+
+            self.states = {}
+            for channel_id, hour, count, total in rows:
+                for key in self._keys(channel_id):
+                    self.states.setdefault(key, WindowState()).add(hour, count, total)
+
+            # Spikes without a channel are country spikes
+            self.active = {
+                ("channel", channel_id) if channel_id is not None else ("country", country): (spike_id, baseline)
+                for spike_id, channel_id, country, baseline in active
+            }
+
+            self._synced = True
+            await self._evaluate(set(self.states) | set(self.active))
+
+    async def update(self, deltas: list[dict]):
+        """Apply the rollup deltas of a committed batch and act on the windows they touched."""
+        async with self._lock:
+            # Until the first sync the state is incomplete; the sync reads
+            # these scores from the rollups anyway.
+            if not self._synced:
+                return
+
+            unknown = {delta["channel_id"] for delta in deltas} - set(self.channels)
+            if unknown:
+                async with async_session() as session:
+                    await self._load_channels(session, unknown)
+
+            touched = set()
+            for delta in deltas:
+                if not delta["toxicity_count"]:
+                    continue
+                for key in self._keys(delta["channel_id"]):
+                    self.states.setdefault(key, WindowState()).add(
+                        delta["hour"], delta["toxicity_count"], delta["toxicity_sum"]
+                    )
+                    touched.add(key)
+
+            if touched:
+                await self._evaluate(touched)
+
+    def _check_key(self, key: tuple, window: dict) -> dict | None:
+        kind, value = key
+        if kind == "channel":
+            channel = self.channels.get(value)
+            if channel is None or not channel.is_active:
+                return None
+            spike = self._check_spike(window, min_posts=CHANNEL_MIN_POSTS)
+            if spike:
+                return {
+                    "channel_id": channel.id,
+                    "channel_username": channel.username,
+                    "country": channel.country,
+                    **spike
+                }
+            return None
+
+        spike = self._check_spike(window, min_posts=COUNTRY_MIN_POSTS)
+        return {"country": value, **spike} if spike else None
+
+    @staticmethod
+    def _spike_filter(key: tuple) -> list:
+        kind, value = key
+        if kind == "channel":
+            return [Spike.channel_id == value]
+        return [Spike.channel_id.is_(None), Spike.country == value]
+
+    async def _evaluate(self, keys: set[tuple]):
+        baseline_cutoff, current_cutoff = self._cutoffs()
+        opened, closed = [], []
+
+        for key in keys:
+            state = self.states.get(key)
+            if state is not None:
+                state.prune(min(baseline_cutoff, current_cutoff))
+                if not state.hours:
+                    del self.states[key]
+                    state = None
+
+            window = state.window(baseline_cutoff, current_cutoff) if state else None
+
+            if key in self.active:
+                # Same rule as close_inactive_spikes
+                spike_id, baseline = self.active[key]
+                current_avg = window["current_avg"] if window else None
+                if current_avg is None or (baseline and current_avg < baseline * self.threshold):
+                    closed.append(key)
+            elif window is not None:
+                spike_data = self._check_key(key, window)
+                if spike_data:
+                    opened.append((key, spike_data))
+
+        if not opened and not closed:
+            return
+
+        async with async_session() as session:
+            if closed:
+                await session.execute(
+                    update(Spike)
+                    .where(Spike.id.in_([self.active[key][0] for key in closed]))
+                    .where(Spike.is_active == True)
+                    .values(is_active=False, spike_end=datetime.utcnow())
+                )
+
+            spikes, adopted = [], []
+            for key, spike_data in opened:
+                # Another processor or the batch detector may have opened
+                # one since the last sync
+                existing = await session.execute(
+                    select(Spike.id, Spike.baseline_avg)
+                    .where(*self._spike_filter(key))
+                    .where(Spike.is_active == True)
+                    .limit(1)
+                )
+                row = existing.first()
+                if row is not None:
+                    adopted.append((key, tuple(row)))
+                    continue
+                spikes.append((key, await self.save_spike(session, spike_data)))
+
+            await session.commit()
+
+        for key in closed:
+            logger.info(f"Closed spike {self.active.pop(key)[0]} ({key[0]} {key[1]})")
+
+        for key, active in adopted:
+            self.active[key] = active
+
+        for key, spike in spikes:
+            self.active[key] = (spike.id, spike.baseline_avg)
+            name = self.channels[key[1]].username if key[0] == "channel" else key[1]
+            logger.info(f"Created spike alert for {key[0]} {name}: {spike.severity}")
+
+    async def run(self):
+        """Sync from the rollups now and every sync_seconds until cancelled."""
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Spike detector sync failed: {e}")
+            await asyncio.sleep(self.sync_seconds)
@@ -1,7 +1,7 @@
 import logging
 from datetime import datetime, timedelta
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 
 from config import config
 from database.connection import async_session
@@ -11,6 +11,10 @@ from analysis.severity import calculate_severity
 
 logger = logging.getLogger(__name__)
 
+# Fewest scored posts in the current window for a spike
+CHANNEL_MIN_POSTS = 5
+COUNTRY_MIN_POSTS = 10
+
 
 class SpikeDetector:
     def __init__(self, threshold: float = None, lookback_hours: int = 24):
@@ -18,95 +22,86 @@ class SpikeDetector:
         self.lookback_hours = lookback_hours
         self.baseline_calc = BaselineCalculator()
 
-    async def detect_channel_spikes(self) -> list[dict]:
-        spikes = []
-
-        async with async_session() as session:
-            result = await session.execute(
-                select(Channel).where(Channel.is_active == True)
-            )
-            channels = result.scalars().all()
-
-        for channel in channels:
-            spike = await self._check_channel_spike(channel)
-            if spike:
-                spikes.append(spike)
-
-        return spikes
-
-    async def _check_channel_spike(self, channel: Channel) -> dict | None:
-        baseline = await self.baseline_calc.calculate_channel_baseline(channel.id)
+    def _check_spike(self, window: dict, min_posts: int) -> dict | None:
+        baseline = window["baseline"]
         if baseline is None or baseline == 0:
             return None
 
-        current_avg, post_count = await self.baseline_calc.get_current_average(
-            channel_id=channel.id,
-            hours=self.lookback_hours
-        )
-
-        if current_avg is None or post_count < 5:
+        current_avg, post_count = window["current_avg"], window["post_count"]
+        if current_avg is None or post_count < min_posts:
             return None
 
         if current_avg >= baseline * self.threshold:
-            spike_percentage = ((current_avg - baseline) / baseline) * 100
-            severity = calculate_severity(baseline, current_avg)
-
             return {
-                "channel_id": channel.id,
-                "channel_username": channel.username,
-                "country": channel.country,
                 "baseline_avg": baseline,
                 "spike_avg": current_avg,
-                "spike_percentage": spike_percentage,
+                "spike_percentage": ((current_avg - baseline) / baseline) * 100,
                 "post_count": post_count,
-                "severity": severity
+                "severity": calculate_severity(baseline, current_avg)
             }
 
         return None
 
-    async def detect_country_spikes(self) -> list[dict]:
+    async def detect_channel_spikes(self) -> list[dict]:
         spikes = []
 
-        async with async_session() as session:
-            result = await session.execute(
-                select(Channel.country).distinct().where(Channel.country.isnot(None))
-            )
-            countries = [row[0] for row in result.all()]
-
-        for country in countries:
-            spike = await self._check_country_spike(country)
+        for window in await self.baseline_calc.get_channel_windows(hours=self.lookback_hours):
+            spike = self._check_spike(window, min_posts=CHANNEL_MIN_POSTS)
             if spike:
-                spikes.append(spike)
+                spikes.append({
+                    "channel_id": window["channel_id"],
+                    "channel_username": window["channel_username"],
+                    "country": window["country"],
+                    **spike
+                })
 
         return spikes
 
-    async def _check_country_spike(self, country: str) -> dict | None:
-        baseline = await self.baseline_calc.calculate_country_baseline(country)
-        if baseline is None or baseline == 0:
-            return None
+    async def detect_country_spikes(self) -> list[dict]:
+        spikes = []
 
-        current_avg, post_count = await self.baseline_calc.get_current_average(
-            country=country,
-            hours=self.lookback_hours
+        for window in await self.baseline_calc.get_country_windows(hours=self.lookback_hours):
+            spike = self._check_spike(window, min_posts=COUNTRY_MIN_POSTS)
+            if spike:
+                spikes.append({"country": window["country"], **spike})
+
+        return spikes
+
+    async def save_spike(self, session, spike_data: dict) -> Spike:
+        """Add a spike for a channel (or, without channel_id, a country) and link its toxic posts."""
+        cutoff = datetime.utcnow() - timedelta(hours=self.lookback_hours)
+
+        spike = Spike(
+            channel_id=spike_data.get("channel_id"),
+            country=spike_data.get("country"),
+            spike_start=cutoff,
+            baseline_avg=spike_data["baseline_avg"],
+            spike_avg=spike_data["spike_avg"],
+            spike_percentage=spike_data["spike_percentage"],
+            post_count=spike_data["post_count"],
+            severity=spike_data["severity"],
+            is_active=True
         )
+        session.add(spike)
+        await session.flush()
 
-        if current_avg is None or post_count < 10:
-            return None
+        query = (
+            select(Post.id)
+            .where(Post.posted_at >= cutoff)
+            .where(Post.toxicity_score >= config.TOXICITY_THRESHOLD)
+        )
+        if spike.channel_id is not None:
+            query = query.where(Post.channel_id == spike.channel_id)
+        else:
+            query = query.join(Channel, Channel.id == Post.channel_id).where(Channel.country == spike.country)
 
-        if current_avg >= baseline * self.threshold:
-            spike_percentage = ((current_avg - baseline) / baseline) * 100
-            severity = calculate_severity(baseline, current_avg)
+        posts_result = await session.execute(query)
+        post_ids = [row[0] for row in posts_result.all()]
 
-            return {
-                "country": country,
-                "baseline_avg": baseline,
-                "spike_avg": current_avg,
-                "spike_percentage": spike_percentage,
-                "post_count": post_count,
-                "severity": severity
-            }
+        for post_id in post_ids:
+            session.add(SpikePost(spike_id=spike.id, post_id=post_id))
 
-        return None
+        return spike
 
     async def detect_and_save_spikes(self) -> list[Spike]:
         channel_spikes = await self.detect_channel_spikes()
@@ -122,32 +117,7 @@ class SpikeDetector:
                 if existing.scalar_one_or_none():
                     continue
 
-                spike = Spike(
-                    channel_id=spike_data["channel_id"],
-                    country=spike_data.get("country"),
-                    spike_start=datetime.utcnow() - timedelta(hours=self.lookback_hours),
-                    baseline_avg=spike_data["baseline_avg"],
-                    spike_avg=spike_data["spike_avg"],
-                    spike_percentage=spike_data["spike_percentage"],
-                    post_count=spike_data["post_count"],
-                    severity=spike_data["severity"],
-                    is_active=True
-                )
-                session.add(spike)
-                await session.flush()
-
-                cutoff = datetime.utcnow() - timedelta(hours=self.lookback_hours)
-                posts_result = await session.execute(
-                    select(Post.id)
-                    .where(Post.channel_id == spike_data["channel_id"])
-                    .where(Post.posted_at >= cutoff)
-                    .where(Post.toxicity_score >= config.TOXICITY_THRESHOLD)
-                )
-                post_ids = [row[0] for row in posts_result.all()]
-
-                for post_id in post_ids:
-                    session.add(SpikePost(spike_id=spike.id, post_id=post_id))
-
+                spike = await self.save_spike(session, spike_data)
                 saved_spikes.append(spike)
                 logger.info(f"Created spike alert for channel {spike_data['channel_username']}: {spike_data['severity']}")
 
@@ -158,23 +128,49 @@ class SpikeDetector:
     async def close_inactive_spikes(self):
         async with async_session() as session:
             result = await session.execute(
-                select(Spike).where(Spike.is_active == True)
+                select(Spike.id, Spike.channel_id, Spike.country, Spike.baseline_avg)
+                .where(Spike.is_active == True)
             )
-            active_spikes = result.scalars().all()
+            active_spikes = result.all()
 
-            for spike in active_spikes:
-                current_avg, _ = await self.baseline_calc.get_current_average(
-                    channel_id=spike.channel_id,
-                    hours=self.lookback_hours
-                )
+        if not active_spikes:
+            return
+
+        # Spikes without a channel are country spikes
+        by_channel, by_country = await self.baseline_calc.get_current_averages(
+            channel_ids=list({spike.channel_id for spike in active_spikes if spike.channel_id is not None}),
+            countries=list({spike.country for spike in active_spikes if spike.channel_id is None and spike.country}),
+            hours=self.lookback_hours
+        )
 
-                if current_avg is None or (spike.baseline_avg and current_avg < spike.baseline_avg * self.threshold):
-                    spike.is_active = False
-                    spike.spike_end = datetime.utcnow()
-                    logger.info(f"Closed spike {spike.id}")
+        to_close = []
+        for spike in active_spikes:
+            if spike.channel_id is not None:
+                current_avg = by_channel.get(spike.channel_id)
+            else:
+                current_avg = by_country.get(spike.country)
 
+            if current_avg is None or (spike.baseline_avg and current_avg < spike.baseline_avg * self.threshold):
+                to_close.append(spike.id)
+
+        if not to_close:
+            return
+
+        async with async_session() as session:
+            # Spikes closed elsewhere since they were read keep their spike_end
+            result = await session.execute(
+                update(Spike)
+                .where(Spike.id.in_(to_close))
+                .where(Spike.is_active == True)
+                .values(is_active=False, spike_end=datetime.utcnow())
+                .returning(Spike.id)
+            )
+            closed = result.scalars().all()
             await session.commit()
 
+        if closed:
+            logger.info(f"Closed {len(closed)} spike(s): {', '.join(map(str, closed))}")
+
 
 async def main():
     from database.connection import init_db
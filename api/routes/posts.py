@@ -5,7 +5,8 @@ from fastapi import APIRouter, Query
 from sqlalchemy import select, func
 
 from database.connection import async_session
-from database.models import Post, Channel, Spike, SpikePost
+from database.models import Post, Channel, Spike, SpikePost, PostHourlyRollup as Rollup
+from database.rollups import hour_bucket, rebuild_rollups, rollup_average
 from api.schemas import PostSchema, StatsSchema, TimelineSchema, TimelinePointSchema
 
 router = APIRouter(prefix="/api", tags=["posts"])
@@ -72,6 +73,7 @@ async def seed_demo_data():
                       baseline_avg=0.25, spike_avg=0.72, spike_percentage=188.0,
                       post_count=127, severity="high", is_active=True)
         session.add(spike)
+        await rebuild_rollups(session)
         await session.commit()
 
         return {"message": "Demo data seeded!", "seeded": True, "channels": 3, "posts": post_id - 1}
@@ -94,26 +96,19 @@ async def get_countries():
 
 @router.get("/stats", response_model=StatsSchema)
 async def get_stats(country: str | None = None):
-    cutoff = datetime.utcnow() - timedelta(hours=24)
+    cutoff = hour_bucket(datetime.utcnow() - timedelta(hours=24))
 
     async with async_session() as session:
-        # Posts count
-        posts_query = select(func.count(Post.id)).where(Post.posted_at >= cutoff)
-        if country:
-            posts_query = posts_query.select_from(Post).join(Channel).where(Channel.country == country)
-        posts_result = await session.execute(posts_query)
-        total_posts = posts_result.scalar() or 0
-
-        # Toxicity average
-        tox_query = (
-            select(func.avg(Post.toxicity_score))
-            .where(Post.posted_at >= cutoff)
-            .where(Post.toxicity_score.isnot(None))
+        # Post count and toxicity average from the hourly rollups
+        rollup_query = (
+            select(func.sum(Rollup.post_count), rollup_average())
+            .where(Rollup.hour >= cutoff)
         )
         if country:
-            tox_query = tox_query.select_from(Post).join(Channel).where(Channel.country == country)
-        toxicity_result = await session.execute(tox_query)
-        avg_toxicity = toxicity_result.scalar()
+            rollup_query = rollup_query.join(Channel, Channel.id == Rollup.channel_id).where(Channel.country == country)
+        rollup_result = await session.execute(rollup_query)
+        total_posts, avg_toxicity = rollup_result.one()
+        total_posts = total_posts or 0
 
         # Active spikes
         from database.models import Spike
@@ -144,29 +139,27 @@ async def get_timeline(
     country: str | None = None,
     days: int = Query(default=7, le=30)
 ):
-    cutoff = datetime.utcnow() - timedelta(days=days)
+    cutoff = hour_bucket(datetime.utcnow() - timedelta(days=days))
 
     async with async_session() as session:
-        from sqlalchemy import extract
-
         query = select(
-            func.date(Post.posted_at).label("date"),
-            func.avg(Post.toxicity_score).label("avg_toxicity"),
-            func.count(Post.id).label("post_count")
+            func.date(Rollup.hour).label("date"),
+            rollup_average().label("avg_toxicity"),
+            func.sum(Rollup.toxicity_count).label("post_count")
         ).where(
-            Post.posted_at >= cutoff
+            Rollup.hour >= cutoff
         ).where(
-            Post.toxicity_score.isnot(None)
+            Rollup.toxicity_count > 0
         ).group_by(
-            func.date(Post.posted_at)
+            func.date(Rollup.hour)
         ).order_by(
-            func.date(Post.posted_at)
+            func.date(Rollup.hour)
         )
 
         if channel_id:
-            query = query.where(Post.channel_id == channel_id)
+            query = query.where(Rollup.channel_id == channel_id)
         elif country:
-            query = query.select_from(Post).join(Channel).where(Channel.country == country)
+            query = query.join(Channel, Channel.id == Rollup.channel_id).where(Channel.country == country)
 
         result = await session.execute(query)
         rows = result.all()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the processing pipeline.
+
+Starts a local fake Perspective server, seeds synthetic posts and runs
+ProcessingPipeline.process_all_unprocessed against it.
+
+The target database must be a scratch database: all tables are dropped
+and recreated.
+
+Usage:
+    python benchmarks/bench_processing.py --posts 2000
+    python benchmarks/bench_processing.py --posts 5000 --latency-ms 80 --rate-limit 50
+    python benchmarks/bench_processing.py --database-url postgresql+asyncpg://localhost/hatewatch_bench
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+WORDS = (
+    "the government announced new measures today while people gathered in the square "
+    "to discuss prices schools roads elections weather football news report update "
+    "they should all leave our country these traitors are destroying everything"
+).split()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the processing pipeline")
+    parser.add_argument("--posts", "-n", type=int, default=2000, help="Synthetic posts to seed (default: 2000)")
+    parser.add_argument("--batch-size", "-b", type=int, default=50, help="Pipeline batch size (default: 50)")
+    parser.add_argument("--database-url", default=None, help="Scratch database URL (default: temporary SQLite file)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake API latency in ms (default: 50)")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="Fake API latency jitter in ms (default: 20)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503 (default: 0)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Fake API quota in requests/sec, 0 for none (default: 0)")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2, help="Fraction of posts that repeat earlier text (default: 0.2)")
+    parser.add_argument("--concurrency", type=int, default=None, help="Perspective concurrency (default: PERSPECTIVE_CONCURRENCY)")
+    parser.add_argument("--qps", type=float, default=None, help="Initial Perspective QPS (default: PERSPECTIVE_QPS)")
+    parser.add_argument("--max-qps", type=float, default=None, help="Maximum Perspective QPS (default: PERSPECTIVE_MAX_QPS)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the fake API (default: 8765)")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    # config reads the environment at import time, so set it up first
+    if args.database_url is None:
+        args.database_url = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["PERSPECTIVE_API_URL"] = f"http://127.0.0.1:{args.port}/v1alpha1/comments:analyze"
+    os.environ["PERSPECTIVE_API_KEY"] = "benchmark"
+    if args.concurrency:
+        os.environ["PERSPECTIVE_CONCURRENCY"] = str(args.concurrency)
+    if args.qps:
+        os.environ["PERSPECTIVE_QPS"] = str(args.qps)
+    if args.max_qps:
+        os.environ["PERSPECTIVE_MAX_QPS"] = str(args.max_qps)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def seed_posts(count: int, duplicate_ratio: float):
+    from sqlalchemy import insert
+    from database.connection import async_session
+    from database.models import Channel, Post
+
+    async with async_session() as session:
+        channel = Channel(telegram_id=1, username="bench_channel", country="Benchland", is_active=True)
+        session.add(channel)
+        await session.flush()
+
+        now = datetime.utcnow()
+        texts = []
+        rows = []
+        for i in range(count):
+            if texts and random.random() < duplicate_ratio:
+                text = random.choice(texts)
+            else:
+                text = " ".join(random.choices(WORDS, k=random.randint(8, 40)))
+                texts.append(text)
+
+            rows.append({
+                "telegram_message_id": i + 1,
+                "channel_id": channel.id,
+                "text": text,
+                "posted_at": now - timedelta(minutes=count - i),
+                "scraped_at": now - timedelta(seconds=count - i),
+            })
+
+        for start in range(0, len(rows), 500):
+            await session.execute(insert(Post), rows[start:start + 500])
+        await session.commit()
+
+
+async def run(args):
+    from sqlalchemy import func, select
+    from benchmarks.fake_perspective import FakePerspective
+    from database.connection import engine, init_db, async_session
+    from database.models import Base, Post
+    from processing.pipeline import ProcessingPipeline
+
+    class InstrumentedPipeline(ProcessingPipeline):
+        def __init__(self):
+            super().__init__(worker_id="bench")
+            self.claimed_at: dict[int, float] = {}
+            self.latencies: list[float] = []
+            self.write_times: list[float] = []
+            self.scored = 0
+            self.rescheduled = 0
+
+        async def claim_posts(self, batch_size: int = 50):
+            posts = await super().claim_posts(batch_size)
+            now = time.perf_counter()
+            for post in posts:
+                # Retried posts are timed from their first claim
+                self.claimed_at.setdefault(post.id, now)
+            return posts
+
+        async def write_rows(self, rows: list[dict], posts: list) -> int | None:
+            started = time.perf_counter()
+            written = await super().write_rows(rows, posts)
+            finished = time.perf_counter()
+            self.write_times.append(finished - started)
+            if written is not None:
+                # Only posts that came back with scores count; retries are
+                # claimed again later and failed posts were never scored
+                for row in rows:
+                    if "processed_at" not in row:
+                        self.rescheduled += 1
+                    elif row["score_source"] != "failed":
+                        self.scored += 1
+                        self.latencies.append(finished - self.claimed_at.pop(row["id"]))
+            return written
+
+    print(f"Database: {args.database_url}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await init_db()
+
+    print(f"Seeding {args.posts} posts...")
+    await seed_posts(args.posts, args.duplicate_ratio)
+
+    fake = FakePerspective(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_qps=args.rate_limit
+    )
+    await fake.start(port=args.port)
+
+    pipeline = InstrumentedPipeline()
+    started = time.perf_counter()
+    await pipeline.process_all_unprocessed(batch_size=args.batch_size)
+    elapsed = time.perf_counter() - started
+
+    await fake.stop()
+
+    async with async_session() as session:
+        result = await session.execute(
+            select(Post.score_source, func.count(Post.id))
+            .group_by(Post.score_source)
+        )
+        sources = {source or "unprocessed": count for source, count in result.all()}
+
+    latencies_ms = [latency * 1000 for latency in pipeline.latencies]
+    write_total = sum(pipeline.write_times)
+
+    print("\nResults")
+    scored = pipeline.scored
+    print(f"  Posts scored:       {scored} ({pipeline.rescheduled} retries scheduled, "
+          f"{sources.get('unprocessed', 0)} still unprocessed)")
+    print(f"  Wall time:          {elapsed:.2f}s")
+    print(f"  Throughput:         {scored / elapsed:.1f} posts/sec")
+    print(f"  Latency p50:        {percentile(latencies_ms, 50):.0f} ms (claim to commit)")
+    print(f"  Latency p99:        {percentile(latencies_ms, 99):.0f} ms")
+    print(f"  DB write time:      {write_total:.2f}s total, "
+          f"{statistics.mean(pipeline.write_times) * 1000 if pipeline.write_times else 0:.1f} ms/batch, "
+          f"{write_total / scored * 1000 if scored else 0:.2f} ms/post")
+    print(f"  API requests:       {fake.requests} ({fake.throttled} throttled, {fake.errors} errors)")
+    print(f"  Cache hit rate:     {pipeline.score_cache.hit_rate:.1%}")
+    print(f"  Score sources:      {sources}")
+
+    await engine.dispose()
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the Telegram scraper.
+
+Drives TelegramScraper against the offline FakeTelegramClient: a first
+scrape of every channel, then incremental rounds after moving the
+simulated clock forward.
+
+The target database must be a scratch database: all tables are dropped
+and recreated.
+
+Usage:
+    python benchmarks/bench_scraper.py --channels 50
+    python benchmarks/bench_scraper.py --channels 200 --latency-ms 100 --flood-rate 0.02
+    python benchmarks/bench_scraper.py --database-url postgresql+asyncpg://localhost/hatewatch_bench
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Telegram scraper")
+    parser.add_argument("--channels", "-n", type=int, default=50, help="Simulated channels (default: 50)")
+    parser.add_argument("--history", type=int, default=1000, help="Messages per channel before the run (default: 1000)")
+    parser.add_argument("--limit", "-l", type=int, default=500, help="Messages per channel on the first scrape (default: 500)")
+    parser.add_argument("--messages-per-minute", type=float, default=10.0, help="Average posting rate per channel (default: 10)")
+    parser.add_argument("--rounds", type=int, default=3, help="Incremental rounds after the first scrape (default: 3)")
+    parser.add_argument("--advance-minutes", type=float, default=30.0, help="Simulated minutes between rounds (default: 30)")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake request latency in ms (default: 50)")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="Fraction of requests answered with FloodWait (default: 0)")
+    parser.add_argument("--flood-seconds", type=int, default=1, help="FloodWait duration in seconds (default: 1)")
+    parser.add_argument("--quota", type=float, default=0.0, help="Fake server request quota per second, 0 for none (default: 0)")
+    parser.add_argument("--requests-per-second", type=float, default=None, help="Scraper request budget (default: TELEGRAM_REQUESTS_PER_SECOND)")
+    parser.add_argument("--concurrency", type=int, default=None, help="Channels scraped at once (default: SCRAPE_CONCURRENCY)")
+    parser.add_argument("--database-url", default=None, help="Scratch database URL (default: temporary SQLite file)")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    # config reads the environment at import time, so set it up first
+    if args.database_url is None:
+        args.database_url = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench.db"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("TELEGRAM_API_ID", "1")
+    os.environ.setdefault("TELEGRAM_API_HASH", "benchmark")
+    if args.requests_per_second:
+        os.environ["TELEGRAM_REQUESTS_PER_SECOND"] = str(args.requests_per_second)
+    if args.concurrency:
+        os.environ["SCRAPE_CONCURRENCY"] = str(args.concurrency)
+
+
+async def run(args):
+    from sqlalchemy import func, select
+    import scraper.telegram_scraper as telegram_scraper
+    from benchmarks.fake_telegram import FakeTelegramClient
+    from database.connection import engine, init_db, async_session
+    from database.models import Base, Post
+    from scraper.telegram_scraper import TelegramScraper
+
+    insert_times: list[float] = []
+    bulk_insert_posts = telegram_scraper.bulk_insert_posts
+
+    async def timed_bulk_insert_posts(session, rows, *a, **kw):
+        started = time.perf_counter()
+        inserted = await bulk_insert_posts(session, rows, *a, **kw)
+        insert_times.append(time.perf_counter() - started)
+        return inserted
+
+    telegram_scraper.bulk_insert_posts = timed_bulk_insert_posts
+
+    print(f"Database: {args.database_url}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await init_db()
+
+    fake = FakeTelegramClient(
+        channels=args.channels,
+        messages_per_minute=args.messages_per_minute,
+        history=args.history,
+        latency_ms=args.latency_ms,
+        flood_rate=args.flood_rate,
+        flood_seconds=args.flood_seconds,
+        requests_per_second=args.quota
+    )
+
+    channels_file = Path(tempfile.mkdtemp()) / "channels.json"
+    channels_file.write_text(json.dumps({
+        "channels": [{"username": username, "country": "Benchland"} for username in fake.usernames]
+    }))
+
+    scraper = TelegramScraper(client=fake)
+    scraper.channels_file = channels_file
+    await scraper.start()
+
+    async def count_posts() -> int:
+        async with async_session() as session:
+            return (await session.execute(select(func.count(Post.id)))).scalar()
+
+    phases = []
+    for round_number in range(args.rounds + 1):
+        if round_number:
+            fake.advance(args.advance_minutes * 60)
+
+        # Counted in the database: retries after a FloodWait are not double counted
+        stored_before = await count_posts()
+        requests_before, insert_before = fake.requests, len(insert_times)
+        started = time.perf_counter()
+        await scraper.scrape_all_channels(limit=args.limit)
+        elapsed = time.perf_counter() - started
+
+        phases.append({
+            "name": "first scrape" if round_number == 0 else f"round {round_number}",
+            "messages": await count_posts() - stored_before,
+            "elapsed": elapsed,
+            "requests": fake.requests - requests_before,
+            "db_time": sum(insert_times[insert_before:])
+        })
+
+    await scraper.stop()
+
+    print("\nResults")
+    for phase in phases:
+        messages = phase["messages"]
+        print(
+            f"  {phase['name']:<13} {messages:>7} msgs in {phase['elapsed']:6.2f}s  "
+            f"{messages / phase['elapsed'] if phase['elapsed'] else 0:8.1f} msgs/sec  "
+            f"{phase['requests']:>5} requests  "
+            f"DB {phase['db_time'] / messages * 1000 if messages else 0:.3f} ms/msg"
+        )
+
+    total_messages = sum(phase["messages"] for phase in phases)
+    total_elapsed = sum(phase["elapsed"] for phase in phases)
+    total_db = sum(phase["db_time"] for phase in phases)
+    print(f"  Total:              {total_messages} msgs, {total_messages / total_elapsed:.1f} msgs/sec")
+    print(f"  DB insert time:     {total_db:.2f}s ({total_db / total_elapsed:.0%} of wall time)")
+    print(f"  Flood waits:        {fake.flood_waits} injected, rate now {scraper.limiter.rate:.2f} req/s")
+    print(f"  Messages served:    {fake.messages_served} (including messages without text)")
+
+    await engine.dispose()
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
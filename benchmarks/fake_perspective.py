@@ -0,0 +1,100 @@
+"""
+Local stand-in for the Perspective comments:analyze endpoint.
+
+Scores are derived from a hash of the text, so repeated texts score the
+same. Latency, error rate and a 429 rate limit are configurable.
+"""
+
+import asyncio
+import hashlib
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+ATTRIBUTES = ["TOXICITY", "SEVERE_TOXICITY", "IDENTITY_ATTACK", "INSULT", "THREAT"]
+
+
+class FakePerspective:
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 20.0,
+        error_rate: float = 0.0,
+        rate_limit_qps: float = 0.0,
+        retry_after: float = 1.0
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_qps = rate_limit_qps
+        self.retry_after = retry_after
+
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+
+        self._tokens = rate_limit_qps
+        self._refilled_at = time.monotonic()
+
+        self.app = FastAPI()
+        self.app.post("/v1alpha1/comments:analyze")(self.analyze)
+
+    def _take_token(self) -> bool:
+        if not self.rate_limit_qps:
+            return True
+
+        now = time.monotonic()
+        self._tokens = min(
+            self.rate_limit_qps,
+            self._tokens + (now - self._refilled_at) * self.rate_limit_qps
+        )
+        self._refilled_at = now
+
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def analyze(self, request: Request):
+        self.requests += 1
+
+        if not self._take_token():
+            self.throttled += 1
+            return JSONResponse(
+                {"error": {"code": 429, "message": "Quota exceeded"}},
+                status_code=429,
+                headers={"Retry-After": str(self.retry_after)}
+            )
+
+        delay = max(self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms), 0)
+        await asyncio.sleep(delay / 1000)
+
+        if random.random() < self.error_rate:
+            self.errors += 1
+            return JSONResponse({"error": {"code": 503, "message": "Backend error"}}, status_code=503)
+
+        body = await request.json()
+        digest = hashlib.sha256(body["comment"]["text"].encode("utf-8")).digest()
+
+        return {
+            "attributeScores": {
+                attr: {"summaryScore": {"value": digest[i] / 255, "type": "PROBABILITY"}}
+                for i, attr in enumerate(ATTRIBUTES)
+            }
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765):
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self._task = asyncio.create_task(self._server.serve())
+        while not self._server.started:
+            await asyncio.sleep(0.05)
+
+    async def stop(self):
+        self._server.should_exit = True
+        await self._task
+
+    def url(self, host: str = "127.0.0.1", port: int = 8765) -> str:
+        return f"http://{host}:{port}/v1alpha1/comments:analyze"
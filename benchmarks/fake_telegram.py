@@ -0,0 +1,213 @@
+"""
+Offline stand-in for the parts of TelegramClient the scraper uses.
+
+Channels post at steady, per-channel rates on a simulated clock, so message
+ids and dates are computed rather than stored and any amount of history
+can be served. Every request (username resolution or a page of history)
+adds latency and can be answered with a FloodWaitError, either at random or
+when a request quota is exceeded.
+"""
+
+import asyncio
+import math
+import random
+import time
+import zlib
+from datetime import datetime, timezone
+
+from telethon import errors
+from telethon.tl.types import Channel, ChatPhotoEmpty, PeerChannel
+
+WORDS = (
+    "the government announced new measures today while people gathered in the square "
+    "to discuss prices schools roads elections weather football news report update "
+    "they should all leave our country these traitors are destroying everything"
+).split()
+
+
+class FakeMessage:
+    def __init__(self, id: int, channel_id: int, text: str, date: datetime):
+        self.id = id
+        self.peer_id = PeerChannel(channel_id)
+        self.text = text
+        self.date = date
+        self.views = id * 3
+        self.forwards = id % 7
+
+
+class FakeChannel:
+    def __init__(self, telegram_id: int, username: str, rate: float, history: int, created_at: float):
+        self.telegram_id = telegram_id
+        self.username = username
+        self.access_hash = zlib.crc32(username.encode()) * 31
+        # Messages per second, and the ids that existed when the clock started
+        self.rate = rate
+        self.history = history
+        self.created_at = created_at
+
+    def count(self, now: float) -> int:
+        return self.history + int((now - self.created_at) * self.rate)
+
+    def date_of(self, message_id: int) -> float:
+        return self.created_at + (message_id - self.history) / self.rate
+
+    def first_id_at(self, timestamp: float) -> int:
+        # Smallest id posted at or after the timestamp
+        position = self.history + (timestamp - self.created_at) * self.rate
+        return max(math.ceil(round(position, 6)), 1)
+
+
+class FakeTelegramClient:
+    def __init__(
+        self,
+        channels: int = 10,
+        messages_per_minute: float = 10.0,
+        history: int = 1000,
+        latency_ms: float = 50.0,
+        flood_rate: float = 0.0,
+        flood_seconds: int = 1,
+        requests_per_second: float = 0.0,
+        page_size: int = 100,
+        text_ratio: float = 0.9,
+        seed: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.flood_rate = flood_rate
+        self.flood_seconds = flood_seconds
+        self.requests_per_second = requests_per_second
+        self.page_size = page_size
+        self.text_ratio = text_ratio
+        self.seed = seed
+
+        self.requests = 0
+        self.flood_waits = 0
+        self.messages_served = 0
+
+        self._offset = 0.0
+        self._connected = False
+        self._random = random.Random(seed)
+        self._tokens = requests_per_second
+        self._refilled_at = time.monotonic()
+
+        now = self.now()
+        self.channels: dict[str, FakeChannel] = {}
+        self.channels_by_id: dict[int, FakeChannel] = {}
+        for i in range(channels):
+            # Activity varies between channels around the configured average
+            rate = messages_per_minute / 60 * self._random.uniform(0.2, 1.8)
+            channel = FakeChannel(1_000_000 + i, f"fake_channel_{i}", rate, history, now)
+            self.channels[channel.username] = channel
+            self.channels_by_id[channel.telegram_id] = channel
+
+    @property
+    def usernames(self) -> list[str]:
+        return list(self.channels)
+
+    def now(self) -> float:
+        return time.time() + self._offset
+
+    def advance(self, seconds: float):
+        """Move the simulated clock forward, as if channels kept posting."""
+        self._offset += seconds
+
+    async def start(self, **kwargs):
+        self._connected = True
+
+    async def disconnect(self):
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def _take_token(self) -> bool:
+        if not self.requests_per_second:
+            return True
+
+        now = time.monotonic()
+        self._tokens = min(
+            self.requests_per_second,
+            self._tokens + (now - self._refilled_at) * self.requests_per_second
+        )
+        self._refilled_at = now
+
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _request(self):
+        self.requests += 1
+        if not self._take_token() or self._random.random() < self.flood_rate:
+            self.flood_waits += 1
+            raise errors.FloodWaitError(None, capture=self.flood_seconds)
+        await asyncio.sleep(self.latency_ms / 1000)
+
+    async def get_entity(self, username: str) -> Channel:
+        await self._request()
+
+        channel = self.channels.get(username.lower().lstrip("@"))
+        if channel is None:
+            raise ValueError(f'No user has "{username}" as username')
+
+        return Channel(
+            id=channel.telegram_id,
+            title=channel.username.replace("_", " ").title(),
+            photo=ChatPhotoEmpty(),
+            date=datetime.fromtimestamp(channel.created_at, timezone.utc),
+            broadcast=True,
+            access_hash=channel.access_hash,
+            username=channel.username,
+            participants_count=1000 + channel.telegram_id % 5000
+        )
+
+    def _message(self, channel: FakeChannel, message_id: int) -> FakeMessage:
+        rng = random.Random(f"{self.seed}:{channel.telegram_id}:{message_id}")
+        text = " ".join(rng.choices(WORDS, k=rng.randint(5, 40))) if rng.random() < self.text_ratio else ""
+        date = datetime.fromtimestamp(channel.date_of(message_id), timezone.utc)
+        return FakeMessage(message_id, channel.telegram_id, text, date)
+
+    async def iter_messages(
+        self,
+        entity,
+        limit: int = None,
+        offset_date: datetime = None,
+        offset_id: int = 0,
+        max_id: int = 0,
+        min_id: int = 0,
+        reverse: bool = False,
+        **kwargs
+    ):
+        channel = self.channels_by_id.get(getattr(entity, "channel_id", None))
+        if channel is None or entity.access_hash != channel.access_hash:
+            raise errors.ChannelInvalidError(None)
+
+        if offset_date and offset_date.tzinfo is None:
+            # Telethon treats naive datetimes as UTC
+            offset_date = offset_date.replace(tzinfo=timezone.utc)
+
+        # Same bounds as Telethon: min_id/max_id are exclusive, offsets
+        # point backwards in time unless reverse is set.
+        low, high = max(min_id + 1, 1), channel.count(self.now())
+        if max_id:
+            high = min(high, max_id - 1)
+        if reverse:
+            if offset_id:
+                low = max(low, offset_id + 1)
+            if offset_date:
+                low = max(low, channel.first_id_at(offset_date.timestamp()))
+            ids = range(low, high + 1)
+        else:
+            if offset_id:
+                high = min(high, offset_id - 1)
+            if offset_date:
+                high = min(high, channel.first_id_at(offset_date.timestamp()) - 1)
+            ids = range(high, low - 1, -1)
+
+        if limit is not None:
+            ids = ids[:limit]
+
+        for index, message_id in enumerate(ids):
+            if index % self.page_size == 0:
+                await self._request()
+            self.messages_served += 1
+            yield self._message(channel, message_id)
@@ -9,18 +9,52 @@ class Config:
     TELEGRAM_API_ID = int(os.getenv("TELEGRAM_API_ID", "0"))
     TELEGRAM_API_HASH = os.getenv("TELEGRAM_API_HASH", "")
     TELEGRAM_PHONE = os.getenv("TELEGRAM_PHONE", "")
+    TELEGRAM_REQUESTS_PER_SECOND = float(os.getenv("TELEGRAM_REQUESTS_PER_SECOND", "3"))
+    TELEGRAM_FLOOD_SLEEP_THRESHOLD = int(os.getenv("TELEGRAM_FLOOD_SLEEP_THRESHOLD", "5"))
+    # Comma-separated session names, one per Telegram account
+    TELEGRAM_SESSIONS = [
+        name.strip() for name in os.getenv("TELEGRAM_SESSIONS", "hatewatch_session").split(",") if name.strip()
+    ]
 
     # Perspective API
     PERSPECTIVE_API_KEY = os.getenv("PERSPECTIVE_API_KEY", "")
-    PERSPECTIVE_API_URL = "https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze"
+    PERSPECTIVE_API_URL = os.getenv(
+        "PERSPECTIVE_API_URL",
+        "https://commentanalyzer.googleapis.com/v1alpha1/comments:analyze"
+    )
+    PERSPECTIVE_QPS = float(os.getenv("PERSPECTIVE_QPS", "1"))
+    PERSPECTIVE_MIN_QPS = float(os.getenv("PERSPECTIVE_MIN_QPS", "0.2"))
+    PERSPECTIVE_MAX_QPS = float(os.getenv("PERSPECTIVE_MAX_QPS", "10"))
+    PERSPECTIVE_CONCURRENCY = int(os.getenv("PERSPECTIVE_CONCURRENCY", "10"))
+    PERSPECTIVE_MAX_RETRIES = int(os.getenv("PERSPECTIVE_MAX_RETRIES", "5"))
+    PERSPECTIVE_BREAKER_FAILURES = int(os.getenv("PERSPECTIVE_BREAKER_FAILURES", "5"))
+    PERSPECTIVE_BREAKER_RESET_SECONDS = float(os.getenv("PERSPECTIVE_BREAKER_RESET_SECONDS", "30"))
+    SCORE_CACHE_SIZE = int(os.getenv("SCORE_CACHE_SIZE", "10000"))
+    LANGDETECT_WORKERS = int(os.getenv("LANGDETECT_WORKERS", "2"))
+    PROCESSING_LEASE_SECONDS = int(os.getenv("PROCESSING_LEASE_SECONDS", "300"))
+    SCORING_MAX_ATTEMPTS = int(os.getenv("SCORING_MAX_ATTEMPTS", "8"))
+    SCORING_RETRY_BASE_SECONDS = int(os.getenv("SCORING_RETRY_BASE_SECONDS", "30"))
+    SCORING_RETRY_MAX_SECONDS = int(os.getenv("SCORING_RETRY_MAX_SECONDS", "3600"))
+    HANDOFF_QUEUE_SIZE = int(os.getenv("HANDOFF_QUEUE_SIZE", "100"))
+    HANDOFF_RECOVERY_SECONDS = int(os.getenv("HANDOFF_RECOVERY_SECONDS", "300"))
 
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./hatewatch.db")
 
     # App settings
     SCRAPE_INTERVAL_MINUTES = int(os.getenv("SCRAPE_INTERVAL_MINUTES", "5"))
+    SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "5"))
+    SCRAPE_MIN_INTERVAL_SECONDS = int(os.getenv("SCRAPE_MIN_INTERVAL_SECONDS", "60"))
+    SCRAPE_MAX_INTERVAL_MINUTES = int(os.getenv("SCRAPE_MAX_INTERVAL_MINUTES", "120"))
+    SCRAPE_POLL_BUDGET_PER_MINUTE = float(os.getenv("SCRAPE_POLL_BUDGET_PER_MINUTE", "60"))
+    REALTIME_FLUSH_MS = int(os.getenv("REALTIME_FLUSH_MS", "250"))
     SPIKE_THRESHOLD = float(os.getenv("SPIKE_THRESHOLD", "1.5"))
     BASELINE_DAYS = int(os.getenv("BASELINE_DAYS", "7"))
+    SPIKE_ZSCORE_THRESHOLD = float(os.getenv("SPIKE_ZSCORE_THRESHOLD", "3.0"))
+    SPIKE_CUSUM_THRESHOLD = float(os.getenv("SPIKE_CUSUM_THRESHOLD", "5.0"))
+    SPIKE_CUSUM_DRIFT = float(os.getenv("SPIKE_CUSUM_DRIFT", "0.5"))
+    SPIKE_SEASONAL_WEEKS = int(os.getenv("SPIKE_SEASONAL_WEEKS", "4"))
+    SPIKE_STREAM_SYNC_SECONDS = int(os.getenv("SPIKE_STREAM_SYNC_SECONDS", "300"))
     TOXICITY_THRESHOLD = float(os.getenv("TOXICITY_THRESHOLD", "0.7"))
 
     # Severity thresholds (percentage increase over baseline)
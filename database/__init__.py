@@ -1,4 +1,9 @@
 from database.connection import get_db, engine, async_session
-from database.models import Base, Channel, Post, Spike, SpikePost
+from database.models import (
+    Base, Channel, Post, Spike, SpikePost, ScoreCacheEntry, BackfillChunk, PostHourlyRollup
+)
 
-__all__ = ["get_db", "engine", "async_session", "Base", "Channel", "Post", "Spike", "SpikePost"]
+__all__ = [
+    "get_db", "engine", "async_session", "Base", "Channel", "Post", "Spike", "SpikePost",
+    "ScoreCacheEntry", "BackfillChunk", "PostHourlyRollup"
+]
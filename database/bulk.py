@@ -0,0 +1,122 @@
+from sqlalchemy import Row, bindparam, cast, column, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Post
+
+# Bound-parameter limits per statement (SQLite's conservative default and asyncpg's)
+MAX_PARAMS = {"sqlite": 999, "postgresql": 32767}
+
+
+def dialect_name(session: AsyncSession) -> str:
+    return session.bind.dialect.name
+
+
+def dialect_insert(session: AsyncSession, model):
+    if dialect_name(session) == "postgresql":
+        return pg_insert(model)
+    return sqlite_insert(model)
+
+
+async def insert_ignore(session: AsyncSession, model, rows: list[dict], index_elements: list[str]) -> None:
+    if not rows:
+        return
+
+    # Column defaults are bound too, so budget for every column of the table
+    chunk_size = max(1, MAX_PARAMS.get(dialect_name(session), 999) // len(model.__table__.columns))
+
+    for start in range(0, len(rows), chunk_size):
+        stmt = dialect_insert(session, model).values(rows[start:start + chunk_size]).on_conflict_do_nothing(
+            index_elements=index_elements
+        )
+        await session.execute(stmt)
+
+
+async def bulk_insert_posts(session: AsyncSession, rows: list[dict], chunk_size: int = 500) -> list[Row]:
+    """Insert scraped posts with multi-row INSERT ... ON CONFLICT DO NOTHING.
+
+    Returns the posts that were actually inserted, with the columns needed
+    to score them (and roll them up) without reading them back.
+    """
+    if not rows:
+        return []
+
+    max_rows = MAX_PARAMS.get(dialect_name(session), 999) // len(rows[0])
+    chunk_size = max(1, min(chunk_size, max_rows))
+
+    inserted = []
+    for start in range(0, len(rows), chunk_size):
+        stmt = (
+            dialect_insert(session, Post)
+            .values(rows[start:start + chunk_size])
+            .on_conflict_do_nothing(index_elements=["channel_id", "telegram_message_id"])
+            .returning(
+                Post.id, Post.channel_id, Post.text, Post.posted_at, Post.views, Post.forwards,
+                Post.scraped_at, Post.scoring_attempts
+            )
+        )
+        result = await session.execute(stmt)
+        inserted.extend(result.all())
+
+    return inserted
+
+
+async def bulk_update_posts(session: AsyncSession, rows: list[dict], claimed_by: str = None) -> list[int]:
+    """Apply per-post updates in a single statement.
+
+    Every row must carry the post ``id`` and the same set of columns. With
+    ``claimed_by``, only posts that worker still holds unprocessed are
+    updated. Returns the ids of the updated posts.
+    """
+    if not rows:
+        return []
+
+    table = Post.__table__
+    columns = [key for key in rows[0] if key != "id"]
+
+    held = []
+    if claimed_by is not None:
+        held = [table.c.claimed_by == claimed_by, table.c.processed_at.is_(None)]
+
+    if dialect_name(session) == "postgresql":
+        # UPDATE posts SET ... FROM (VALUES ...) AS v(id, ...) WHERE posts.id = v.id.
+        # NULLs are rendered untyped inside VALUES, so cast back on assignment.
+        data = values(
+            *(column(key, table.c[key].type) for key in ["id", *columns]),
+            name="v"
+        ).data([tuple(row[key] for key in ["id", *columns]) for row in rows])
+
+        result = await session.execute(
+            update(table)
+            .where(table.c.id == data.c.id, *held)
+            .values({key: cast(data.c[key], table.c[key].type) for key in columns})
+            .returning(table.c.id)
+        )
+        return list(result.scalars().all())
+
+    ids = [row["id"] for row in rows]
+    if held:
+        # executemany cannot return rows, so first find the posts still held
+        # with a no-op UPDATE; it takes SQLite's write lock, so they stay held
+        # until commit.
+        result = await session.execute(
+            update(table)
+            .where(table.c.id.in_(ids), *held)
+            .values(claimed_by=table.c.claimed_by)
+            .returning(table.c.id)
+        )
+        held_ids = set(result.scalars().all())
+        rows = [row for row in rows if row["id"] in held_ids]
+        ids = [row["id"] for row in rows]
+        if not rows:
+            return []
+
+    # One prepared UPDATE executed with executemany
+    await session.execute(
+        update(table)
+        .where(table.c.id == bindparam("_id"))
+        .values({key: bindparam(key) for key in columns}),
+        [{"_id": row["id"], **{key: row[key] for key in columns}} for row in rows]
+    )
+    return ids
@@ -1,3 +1,4 @@
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
@@ -20,10 +21,37 @@ async def get_db():
             await session.close()
 
 
+def _add_missing_columns(sync_conn):
+    # create_all() only creates missing tables; bring existing ones up to
+    # date with columns and indexes added to the models since.
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=sync_conn.dialect)
+                sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
 async def init_db():
     from database.models import Base
     async with engine.begin() as conn:
+        existing = await conn.run_sync(lambda sync_conn: set(inspect(sync_conn).get_table_names()))
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+
+    if "post_hourly_rollups" not in existing:
+        # New rollup table: fill it from posts scored before it existed
+        from database.rollups import rebuild_rollups
+        async with async_session() as session:
+            await rebuild_rollups(session)
+            await session.commit()
 
 
 async def close_db():
@@ -12,6 +12,8 @@ class Channel(Base):
 
     id = Column(Integer, primary_key=True)
     telegram_id = Column(BigInteger, unique=True, nullable=False)
+    # Resolved peer access hash, reused instead of resolving the username
+    access_hash = Column(BigInteger)
     username = Column(String(255))
     title = Column(String(255))
     description = Column(Text)
@@ -20,6 +22,10 @@ class Channel(Base):
     language = Column(String(10))
     category = Column(String(100))
     is_active = Column(Boolean, default=True)
+
+    # Highest telegram_message_id scraped so far (incremental scraping)
+    last_message_id = Column(BigInteger)
+
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -51,6 +57,9 @@ class Post(Base):
     insult_score = Column(Float)
     threat_score = Column(Float)
 
+    # Where the scores came from: perspective, cache or failed
+    score_source = Column(String(20))
+
     # HateWatch analysis
     is_hate_speech = Column(Boolean)
     target_group = Column(String(255))
@@ -60,6 +69,14 @@ class Post(Base):
     scraped_at = Column(DateTime, default=datetime.utcnow)
     processed_at = Column(DateTime)
 
+    # Processing lease, so several processors can share the backlog
+    claimed_by = Column(String(100))
+    lease_expires_at = Column(DateTime)
+
+    # Failed scoring attempts and when the post may be retried
+    scoring_attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime)
+
     channel = relationship("Channel", back_populates="posts")
     spike_posts = relationship("SpikePost", back_populates="post")
 
@@ -68,6 +85,13 @@ class Post(Base):
         Index("idx_posts_channel_posted", "channel_id", "posted_at"),
         Index("idx_posts_toxicity", "toxicity_score"),
         Index("idx_posts_posted_at", "posted_at"),
+        # Backlog access path: only unprocessed rows, in claim order
+        Index(
+            "idx_posts_unprocessed",
+            "scraped_at",
+            postgresql_where=processed_at.is_(None),
+            sqlite_where=processed_at.is_(None),
+        ),
     )
 
 
@@ -108,3 +132,81 @@ class SpikePost(Base):
 
     spike = relationship("Spike", back_populates="spike_posts")
     post = relationship("Post", back_populates="spike_posts")
+
+
+class ScoreCacheEntry(Base):
+    __tablename__ = "score_cache"
+
+    text_hash = Column(String(64), primary_key=True)
+    language = Column(String(10), primary_key=True, default="")
+
+    toxicity_score = Column(Float)
+    severe_toxicity_score = Column(Float)
+    identity_attack_score = Column(Float)
+    insult_score = Column(Float)
+    threat_score = Column(Float)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PostHourlyRollup(Base):
+    """Aggregates of scored posts per channel and posted_at hour.
+
+    Covers exactly the posts with processed_at set: the processor adds a
+    post when it scores it, and an edit that sends a post back for
+    scoring takes it out again. Averages and variances come from the
+    count, sum and sum of squares of each attribute.
+    """
+
+    __tablename__ = "post_hourly_rollups"
+
+    channel_id = Column(Integer, ForeignKey("channels.id"), primary_key=True)
+    hour = Column(DateTime, primary_key=True)
+
+    post_count = Column(Integer, nullable=False, default=0)
+    hate_count = Column(Integer, nullable=False, default=0)
+    views_sum = Column(BigInteger, nullable=False, default=0)
+    forwards_sum = Column(BigInteger, nullable=False, default=0)
+
+    toxicity_count = Column(Integer, nullable=False, default=0)
+    toxicity_sum = Column(Float, nullable=False, default=0.0)
+    toxicity_sumsq = Column(Float, nullable=False, default=0.0)
+    severe_toxicity_count = Column(Integer, nullable=False, default=0)
+    severe_toxicity_sum = Column(Float, nullable=False, default=0.0)
+    severe_toxicity_sumsq = Column(Float, nullable=False, default=0.0)
+    identity_attack_count = Column(Integer, nullable=False, default=0)
+    identity_attack_sum = Column(Float, nullable=False, default=0.0)
+    identity_attack_sumsq = Column(Float, nullable=False, default=0.0)
+    insult_count = Column(Integer, nullable=False, default=0)
+    insult_sum = Column(Float, nullable=False, default=0.0)
+    insult_sumsq = Column(Float, nullable=False, default=0.0)
+    threat_count = Column(Integer, nullable=False, default=0)
+    threat_sum = Column(Float, nullable=False, default=0.0)
+    threat_sumsq = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        Index("idx_rollups_hour", "hour"),
+    )
+
+
+class BackfillChunk(Base):
+    __tablename__ = "backfill_chunks"
+
+    id = Column(Integer, primary_key=True)
+    channel_id = Column(Integer, ForeignKey("channels.id"), nullable=False)
+
+    # Date range covered by the chunk: [start_date, end_date)
+    start_date = Column(DateTime, nullable=False)
+    end_date = Column(DateTime, nullable=False)
+
+    # Oldest message id stored so far; the chunk resumes below it
+    cursor_id = Column(BigInteger)
+    status = Column(String(20), default="pending")
+    messages_saved = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("channel_id", "start_date", "end_date", name="uix_backfill_chunk"),
+    )
@@ -0,0 +1,128 @@
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.bulk import MAX_PARAMS, dialect_insert, dialect_name
+from database.models import Post, PostHourlyRollup
+
+ROLLUP_ATTRIBUTES = ["toxicity", "severe_toxicity", "identity_attack", "insult", "threat"]
+
+# Columns that accumulate; every delta row carries all of them
+ROLLUP_COLUMNS = ["post_count", "hate_count", "views_sum", "forwards_sum"] + [
+    f"{attribute}_{stat}" for attribute in ROLLUP_ATTRIBUTES for stat in ("count", "sum", "sumsq")
+]
+
+# Post columns a post's contribution to the rollups is computed from
+ROLLUP_SOURCE_COLUMNS = [
+    Post.channel_id, Post.posted_at, Post.is_hate_speech, Post.views, Post.forwards,
+    *(getattr(Post, f"{attribute}_score") for attribute in ROLLUP_ATTRIBUTES)
+]
+
+
+def hour_bucket(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup_deltas(posts: list[dict], sign: int = 1) -> list[dict]:
+    """Collapse per-post values into one delta row per (channel_id, hour).
+
+    Each post needs channel_id, posted_at, is_hate_speech, views, forwards
+    and the ``<attribute>_score`` columns. Use ``sign=-1`` to take posts out.
+    """
+    deltas: dict[tuple[int, datetime], dict] = {}
+
+    for post in posts:
+        if post["channel_id"] is None:
+            continue
+
+        key = (post["channel_id"], hour_bucket(post["posted_at"]))
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = {"channel_id": key[0], "hour": key[1], **dict.fromkeys(ROLLUP_COLUMNS, 0)}
+
+        delta["post_count"] += sign
+        delta["hate_count"] += sign if post["is_hate_speech"] else 0
+        delta["views_sum"] += sign * (post["views"] or 0)
+        delta["forwards_sum"] += sign * (post["forwards"] or 0)
+
+        for attribute in ROLLUP_ATTRIBUTES:
+            score = post[f"{attribute}_score"]
+            if score is not None:
+                delta[f"{attribute}_count"] += sign
+                delta[f"{attribute}_sum"] += sign * score
+                delta[f"{attribute}_sumsq"] += sign * score * score
+
+    return list(deltas.values())
+
+
+async def apply_rollup_deltas(session: AsyncSession, deltas: list[dict]) -> None:
+    """Add delta rows to the rollups with INSERT ... ON CONFLICT DO UPDATE."""
+    if not deltas:
+        return
+
+    table = PostHourlyRollup.__table__
+    chunk_size = max(1, MAX_PARAMS.get(dialect_name(session), 999) // (len(ROLLUP_COLUMNS) + 2))
+
+    for start in range(0, len(deltas), chunk_size):
+        stmt = dialect_insert(session, PostHourlyRollup).values(deltas[start:start + chunk_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["channel_id", "hour"],
+            set_={name: table.c[name] + stmt.excluded[name] for name in ROLLUP_COLUMNS}
+        )
+        await session.execute(stmt)
+
+
+def rollup_average(hours_from: datetime = None):
+    """Mean toxicity over rollup rows (optionally only hours from ``hours_from``)."""
+    if hours_from is None:
+        total, count = PostHourlyRollup.toxicity_sum, PostHourlyRollup.toxicity_count
+    else:
+        total = case((PostHourlyRollup.hour >= hours_from, PostHourlyRollup.toxicity_sum), else_=0.0)
+        count = case((PostHourlyRollup.hour >= hours_from, PostHourlyRollup.toxicity_count), else_=0)
+    return func.sum(total) / func.nullif(func.sum(count), 0)
+
+
+def _hour_expression(session: AsyncSession):
+    if dialect_name(session) == "postgresql":
+        return func.date_trunc("hour", Post.posted_at)
+    # Same text format SQLAlchemy stores SQLite datetimes in
+    return func.strftime("%Y-%m-%d %H:00:00.000000", Post.posted_at)
+
+
+async def rebuild_rollups(session: AsyncSession, since: datetime = None) -> None:
+    """Recompute the rollups from the posts table, for hours from ``since`` on."""
+    hour = _hour_expression(session)
+
+    # Same order as ROLLUP_COLUMNS
+    aggregates = [
+        func.count(Post.id),
+        func.coalesce(func.sum(case((Post.is_hate_speech == True, 1), else_=0)), 0),
+        func.coalesce(func.sum(Post.views), 0),
+        func.coalesce(func.sum(Post.forwards), 0),
+    ]
+    for attribute in ROLLUP_ATTRIBUTES:
+        score = getattr(Post, f"{attribute}_score")
+        aggregates += [
+            func.count(score),
+            func.coalesce(func.sum(score), 0.0),
+            func.coalesce(func.sum(score * score), 0.0),
+        ]
+
+    clear = delete(PostHourlyRollup)
+    source = (
+        select(Post.channel_id, hour.label("hour"), *aggregates)
+        .where(Post.processed_at.isnot(None))
+        .where(Post.channel_id.isnot(None))
+        .group_by(Post.channel_id, hour)
+    )
+
+    if since is not None:
+        since = hour_bucket(since)
+        clear = clear.where(PostHourlyRollup.hour >= since)
+        source = source.where(Post.posted_at >= since)
+
+    await session.execute(clear)
+    await session.execute(
+        insert(PostHourlyRollup).from_select(["channel_id", "hour", *ROLLUP_COLUMNS], source)
+    )
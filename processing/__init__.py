@@ -1,5 +1,5 @@
 from processing.perspective import PerspectiveClient
-from processing.language_detect import detect_language
+from processing.language_detect import detect_language, detect_languages
 from processing.pipeline import ProcessingPipeline
 
-__all__ = ["PerspectiveClient", "detect_language", "ProcessingPipeline"]
+__all__ = ["PerspectiveClient", "detect_language", "detect_languages", "ProcessingPipeline"]
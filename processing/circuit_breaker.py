@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Stops calling a degraded upstream until it has had time to recover.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    holds callers back for ``reset_timeout`` seconds. It then lets a single
+    probe through (half-open); a successful probe closes it and releases
+    everyone waiting, a failed one reopens it with the timeout doubled, up
+    to ``max_reset_timeout``.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, max_reset_timeout: float = 600.0):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reset_timeout = reset_timeout
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._changed = asyncio.Event()
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and time.monotonic() < self.opened_at + self.reset_timeout
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if time.monotonic() < self.opened_at + self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    async def acquire(self):
+        while not self.allow():
+            if self.state == self.OPEN:
+                await asyncio.sleep(max(self.opened_at + self.reset_timeout - time.monotonic(), 0))
+            else:
+                # Half-open with the probe in flight: wait for its outcome
+                await self._changed.wait()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("Circuit breaker closed, upstream recovered")
+            self._notify()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.reset_timeout = self.base_reset_timeout
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+
+        if self.state == self.HALF_OPEN:
+            self.reset_timeout = min(self.reset_timeout * 2, self.max_reset_timeout)
+            self._open()
+        elif self.state == self.CLOSED and self.failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._notify()
+        logger.warning(f"Circuit breaker open, pausing calls for {self.reset_timeout:.0f}s")
+
+    async def wait_until_ready(self):
+        while self.is_open:
+            await asyncio.sleep(self.opened_at + self.reset_timeout - time.monotonic())
@@ -1,11 +1,19 @@
+import asyncio
 import logging
+from concurrent.futures import ProcessPoolExecutor
+
 from langdetect import detect, DetectorFactory
 from langdetect.lang_detect_exception import LangDetectException
 
+from config import config
+
 logger = logging.getLogger(__name__)
 
 DetectorFactory.seed = 0
 
+_pool: ProcessPoolExecutor | None = None
+_pool_workers = 0
+
 
 def detect_language(text: str) -> str | None:
     if not text or len(text.strip()) < 10:
@@ -18,3 +26,45 @@ def detect_language(text: str) -> str | None:
     except Exception as e:
         logger.warning(f"Language detection error: {e}")
         return None
+
+
+def _detect_chunk(texts: list[str]) -> list[str | None]:
+    return [detect_language(text) for text in texts]
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=workers)
+        _pool_workers = workers
+    return _pool
+
+
+async def detect_languages(texts: list[str], workers: int = None) -> list[str | None]:
+    if not texts:
+        return []
+
+    workers = config.LANGDETECT_WORKERS if workers is None else workers
+    loop = asyncio.get_running_loop()
+
+    if workers <= 0:
+        # No pool configured: still keep detection off the event loop
+        return await loop.run_in_executor(None, _detect_chunk, texts)
+
+    pool = _get_pool(workers)
+    chunk_size = -(-len(texts) // workers)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+    results = await asyncio.gather(
+        *(loop.run_in_executor(pool, _detect_chunk, chunk) for chunk in chunks)
+    )
+    return [language for chunk in results for language in chunk]
+
+
+def shutdown_language_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
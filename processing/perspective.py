@@ -3,9 +3,10 @@ import logging
 from typing import Optional
 
 import httpx
-from asyncio_throttle import Throttler
 
 from config import config
+from processing.circuit_breaker import CircuitBreaker
+from processing.rate_limiter import AdaptiveRateLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +20,38 @@ TOXICITY_ATTRIBUTES = [
 
 
 class PerspectiveClient:
-    def __init__(self, api_key: str = None, qps: int = 1):
+    def __init__(
+        self,
+        api_key: str = None,
+        qps: float = None,
+        max_qps: float = None,
+        concurrency: int = None
+    ):
         self.api_key = api_key or config.PERSPECTIVE_API_KEY
         self.api_url = config.PERSPECTIVE_API_URL
-        self.throttler = Throttler(rate_limit=qps, period=1.0)
+        self.limiter = AdaptiveRateLimiter(
+            rate=qps or config.PERSPECTIVE_QPS,
+            min_rate=config.PERSPECTIVE_MIN_QPS,
+            max_rate=max_qps or config.PERSPECTIVE_MAX_QPS
+        )
+        self.concurrency = concurrency or config.PERSPECTIVE_CONCURRENCY
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.max_retries = config.PERSPECTIVE_MAX_RETRIES
+        self.breaker = CircuitBreaker(
+            failure_threshold=config.PERSPECTIVE_BREAKER_FAILURES,
+            reset_timeout=config.PERSPECTIVE_BREAKER_RESET_SECONDS
+        )
         self._client: Optional[httpx.AsyncClient] = None
 
     async def __aenter__(self):
-        self._client = httpx.AsyncClient(timeout=30.0)
+        self._client = httpx.AsyncClient(
+            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency
+            )
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -54,35 +79,61 @@ class PerspectiveClient:
 
         return scores
 
-    async def score_text(self, text: str, language: str = None) -> dict:
+    def _retry_after(self, response: httpx.Response) -> float | None:
+        try:
+            return float(response.headers.get("Retry-After"))
+        except (TypeError, ValueError):
+            return None
+
+    async def score_text(self, text: str, language: str = None) -> dict | None:
+        """Score one text; returns None if scoring failed and should be retried."""
         if not text or not text.strip():
             return {attr.lower(): None for attr in TOXICITY_ATTRIBUTES}
 
-        async with self.throttler:
-            try:
-                request_body = self._build_request(text, language)
-                response = await self._client.post(
-                    f"{self.api_url}?key={self.api_key}",
-                    json=request_body
-                )
-                response.raise_for_status()
+        request_body = self._build_request(text, language)
+
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.breaker.acquire()
+                await self.limiter.acquire()
+                try:
+                    response = await self._client.post(
+                        f"{self.api_url}?key={self.api_key}",
+                        json=request_body
+                    )
+                    response.raise_for_status()
+
+                except httpx.HTTPStatusError as e:
+                    status = e.response.status_code
+                    if status == 429:
+                        logger.warning(f"Rate limited (attempt {attempt + 1}), backing off...")
+                        self.breaker.record_success()
+                        self.limiter.on_throttled(self._retry_after(e.response))
+                        continue
+                    if status == 400:
+                        # The text itself was rejected (e.g. unsupported language);
+                        # retrying will not help, so record it as unscored.
+                        logger.warning(f"API rejected text: {e.response.text}")
+                        self.breaker.record_success()
+                        return {attr.lower(): None for attr in TOXICITY_ATTRIBUTES}
+                    logger.error(f"API error: {status} - {e.response.text}")
+                    self.breaker.record_failure()
+                    return None
+
+                except Exception as e:
+                    logger.error(f"Error scoring text: {e}")
+                    self.breaker.record_failure()
+                    return None
+
+                self.breaker.record_success()
+                self.limiter.on_success()
                 return self._parse_response(response.json())
 
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 429:
-                    logger.warning("Rate limited, waiting...")
-                    await asyncio.sleep(5)
-                    return await self.score_text(text, language)
-                logger.error(f"API error: {e.response.status_code} - {e.response.text}")
-                return {attr.lower(): None for attr in TOXICITY_ATTRIBUTES}
-
-            except Exception as e:
-                logger.error(f"Error scoring text: {e}")
-                return {attr.lower(): None for attr in TOXICITY_ATTRIBUTES}
-
-    async def score_batch(self, texts: list[tuple[int, str, str]]) -> list[tuple[int, dict]]:
-        results = []
-        for post_id, text, language in texts:
-            scores = await self.score_text(text, language)
-            results.append((post_id, scores))
-        return results
+        logger.error(f"Still rate limited after {self.max_retries + 1} attempts, giving up")
+        return None
+
+    async def score_batch(self, texts: list[tuple[int, str, str]]) -> list[tuple[int, dict | None]]:
+        scores = await asyncio.gather(
+            *(self.score_text(text, language) for _, text, language in texts)
+        )
+        return [(post_id, result) for (post_id, _, _), result in zip(texts, scores)]
@@ -1,37 +1,128 @@
 import asyncio
 import logging
-from datetime import datetime
+import os
+import random
+import socket
+from datetime import datetime, timedelta
 
-from sqlalchemy import select, update
+from sqlalchemy import func, or_, select, update
 
 from config import config
+from database.bulk import bulk_update_posts, dialect_name
 from database.connection import async_session
 from database.models import Post
-from processing.perspective import PerspectiveClient
-from processing.language_detect import detect_language
+from database.rollups import ROLLUP_ATTRIBUTES, apply_rollup_deltas, rollup_deltas
+from processing.perspective import PerspectiveClient, TOXICITY_ATTRIBUTES
+from processing.language_detect import detect_languages, shutdown_language_pool
+from processing.score_cache import ScoreCache, cache_key
 
 logger = logging.getLogger(__name__)
 
 
 class ProcessingPipeline:
-    def __init__(self):
+    def __init__(self, worker_id: str = None, spike_detector=None):
         self.toxicity_threshold = config.TOXICITY_THRESHOLD
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = config.PROCESSING_LEASE_SECONDS
+        self.max_attempts = config.SCORING_MAX_ATTEMPTS
+        self.retry_base_seconds = config.SCORING_RETRY_BASE_SECONDS
+        self.retry_max_seconds = config.SCORING_RETRY_MAX_SECONDS
+        self.score_cache = ScoreCache()
+        self.perspective: PerspectiveClient | None = None
+        # OnlineSpikeDetector fed with every committed batch
+        self.spike_detector = spike_detector
+
+    async def start(self):
+        if self.perspective is None:
+            self.perspective = PerspectiveClient()
+            await self.perspective.__aenter__()
+
+    async def close(self):
+        if self.perspective is not None:
+            await self.perspective.__aexit__(None, None, None)
+            self.perspective = None
+        # The detection processes are started again on the next batch
+        shutdown_language_pool()
+
+    async def claim_posts(self, batch_size: int = 50) -> list[Post]:
+        now = datetime.utcnow()
 
-    async def get_unprocessed_posts(self, batch_size: int = 50) -> list[Post]:
         async with async_session() as session:
-            result = await session.execute(
-                select(Post)
+            candidates = (
+                select(Post.id)
                 .where(Post.processed_at.is_(None))
+                .where(or_(Post.lease_expires_at.is_(None), Post.lease_expires_at < now))
+                .where(or_(Post.next_attempt_at.is_(None), Post.next_attempt_at <= now))
                 .order_by(Post.scraped_at.asc())
                 .limit(batch_size)
             )
-            return result.scalars().all()
+            if dialect_name(session) == "postgresql":
+                candidates = candidates.with_for_update(skip_locked=True)
 
-    async def process_post(self, post: Post, perspective: PerspectiveClient) -> dict:
-        language = detect_language(post.text)
+            # A single UPDATE ... RETURNING claims atomically: Postgres skips rows
+            # other workers hold locked, SQLite serializes writers.
+            result = await session.execute(
+                update(Post)
+                .where(Post.id.in_(candidates.scalar_subquery()))
+                .values(
+                    claimed_by=self.worker_id,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds)
+                )
+                .returning(Post)
+                .execution_options(synchronize_session=False)
+            )
+            posts = result.scalars().all()
+            await session.commit()
 
-        scores = await perspective.score_text(post.text, language)
+        return sorted(posts, key=lambda post: post.scraped_at)
 
+    async def claim_handoff(self, posts: list) -> list:
+        """Lease posts handed over by an in-process scraper.
+
+        Only the posts no other worker holds are kept; the rest are left to
+        whoever claimed them.
+        """
+        now = datetime.utcnow()
+
+        async with async_session() as session:
+            result = await session.execute(
+                update(Post)
+                .where(Post.id.in_([post.id for post in posts]))
+                .where(Post.processed_at.is_(None))
+                .where(or_(Post.lease_expires_at.is_(None), Post.lease_expires_at < now))
+                .values(
+                    claimed_by=self.worker_id,
+                    lease_expires_at=now + timedelta(seconds=self.lease_seconds)
+                )
+                .returning(Post.id)
+                .execution_options(synchronize_session=False)
+            )
+            claimed = set(result.scalars().all())
+            await session.commit()
+
+        return [post for post in posts if post.id in claimed]
+
+    async def get_backlog_stats(self) -> dict:
+        now = datetime.utcnow()
+
+        async with async_session() as session:
+            result = await session.execute(
+                select(
+                    func.count(Post.id),
+                    func.min(Post.scraped_at),
+                    func.count(Post.next_attempt_at)
+                ).where(Post.processed_at.is_(None))
+            )
+            pending, oldest, retrying = result.one()
+
+        return {
+            "pending": pending,
+            "retrying": retrying,
+            "oldest_scraped_at": oldest,
+            "age_seconds": (now - oldest).total_seconds() if oldest else 0.0
+        }
+
+    def build_updates(self, language: str | None, scores: dict, source: str) -> dict:
         toxicity = scores.get("toxicity")
         is_hate_speech = toxicity is not None and toxicity >= self.toxicity_threshold
 
@@ -43,61 +134,318 @@ class ProcessingPipeline:
             "insult_score": scores.get("insult"),
             "threat_score": scores.get("threat"),
             "is_hate_speech": is_hate_speech,
-            "processed_at": datetime.utcnow()
+            "score_source": source,
+            "processed_at": datetime.utcnow(),
+            "claimed_by": None,
+            "lease_expires_at": None
         }
 
-    async def process_batch(self, batch_size: int = 50) -> int:
-        posts = await self.get_unprocessed_posts(batch_size)
+    def build_retry(self, post: Post, language: str | None) -> dict:
+        attempts = (post.scoring_attempts or 0) + 1
+
+        if attempts >= self.max_attempts:
+            logger.warning(f"Giving up on post {post.id} after {attempts} failed scoring attempts")
+            empty = {attr.lower(): None for attr in TOXICITY_ATTRIBUTES}
+            return {
+                **self.build_updates(language, empty, "failed"),
+                "scoring_attempts": attempts,
+                "next_attempt_at": None
+            }
+
+        # Exponential backoff with jitter so retries do not all land at once
+        delay = min(self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+        delay *= random.uniform(0.5, 1.5)
+
+        return {
+            "scoring_attempts": attempts,
+            "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay),
+            "claimed_by": None,
+            "lease_expires_at": None
+        }
 
+    async def score_posts(self, posts: list[Post], languages: dict[int, str | None]) -> dict[int, tuple[dict, str]]:
         if not posts:
-            logger.info("No unprocessed posts found")
-            return 0
+            return {}
 
-        logger.info(f"Processing {len(posts)} posts...")
+        keys = {post.id: cache_key(post.text, languages[post.id]) for post in posts}
+        cached = await self.score_cache.get_many(set(keys.values()))
+
+        # Reposts within one batch share a key, so each distinct text is scored once
+        to_score = {}
+        for post in posts:
+            key = keys[post.id]
+            if key not in cached and key not in to_score:
+                to_score[key] = (post.text, languages[post.id])
+
+        scored = {}
+        if to_score:
+            await self.start()
+            results = await self.perspective.score_batch(
+                [(key, text, language) for key, (text, language) in to_score.items()]
+            )
+            scored = dict(results)
+            await self.score_cache.put_many(scored)
+
+        hits = sum(1 for key in keys.values() if key in cached)
+        self.score_cache.record(hits, len(posts) - hits)
+        logger.info(
+            f"Score cache: {hits}/{len(posts)} hits this batch, "
+            f"{self.score_cache.hit_rate:.1%} overall"
+        )
+
+        return {
+            post_id: (cached[key], "cache") if key in cached else (scored[key], "perspective")
+            for post_id, key in keys.items()
+        }
+
+    async def score_batch(self, posts: list[Post]) -> list[dict]:
+        detected = await detect_languages([post.text for post in posts])
+        languages = {post.id: language for post, language in zip(posts, detected)}
+
+        results = await self.score_posts(posts, languages)
+
+        by_id = {post.id: post for post in posts}
+        rows = []
+        for post_id, (scores, source) in results.items():
+            if scores is None:
+                rows.append({"id": post_id, **self.build_retry(by_id[post_id], languages[post_id])})
+            else:
+                rows.append({"id": post_id, **self.build_updates(languages[post_id], scores, source)})
 
-        async with PerspectiveClient() as perspective:
-            async with async_session() as session:
-                for post in posts:
-                    try:
-                        updates = await self.process_post(post, perspective)
+        failed = sum(1 for scores, _ in results.values() if scores is None)
+        if failed:
+            logger.warning(f"Scoring failed for {failed}/{len(posts)} posts, scheduled for retry")
 
-                        await session.execute(
-                            update(Post)
-                            .where(Post.id == post.id)
-                            .values(**updates)
-                        )
+        return rows
 
-                    except Exception as e:
-                        logger.error(f"Error processing post {post.id}: {e}")
-                        continue
+    def rollup_rows(self, posts: list, rows: list[dict]) -> list[dict]:
+        by_id = {post.id: post for post in posts}
+        scored = []
+        for row in rows:
+            # Retries stay unprocessed and out of the rollups
+            if "processed_at" not in row:
+                continue
+            post = by_id[row["id"]]
+            scored.append({
+                "channel_id": post.channel_id,
+                "posted_at": post.posted_at,
+                "views": post.views,
+                "forwards": post.forwards,
+                "is_hate_speech": row["is_hate_speech"],
+                **{f"{attribute}_score": row[f"{attribute}_score"] for attribute in ROLLUP_ATTRIBUTES}
+            })
+        return rollup_deltas(scored)
 
+    async def write_rows(self, rows: list[dict], posts: list) -> int | None:
+        """Write back a batch's scores and retries; returns how many were written, None on error.
+
+        Only posts this worker still holds are written. A post whose lease
+        expired mid-batch may have been claimed and scored by another
+        worker, and keeps that worker's result.
+        """
+        async with async_session() as session:
+            # Scored posts and retries update different columns
+            groups = {}
+            for row in rows:
+                groups.setdefault(tuple(sorted(row)), []).append(row)
+
+            try:
+                written = []
+                for group in groups.values():
+                    written.extend(await bulk_update_posts(session, group, claimed_by=self.worker_id))
+                # Hourly rollups change in the same transaction as the scores,
+                # and only for the posts actually written
+                written_ids = set(written)
+                deltas = self.rollup_rows(posts, [row for row in rows if row["id"] in written_ids])
+                await apply_rollup_deltas(session, deltas)
                 await session.commit()
+            except Exception as e:
+                logger.error(f"Error writing scores for {len(rows)} posts: {e}")
+                await session.rollback()
+                return None
+
+        if len(written) < len(rows):
+            logger.warning(f"Lease lost on {len(rows) - len(written)}/{len(rows)} posts, their results were dropped")
+
+        if self.spike_detector is not None:
+            try:
+                await self.spike_detector.update(deltas)
+            except Exception as e:
+                # The scores are stored; the detector's next sync catches up
+                logger.error(f"Error updating spike detector: {e}")
+
+        return len(written)
+
+    async def process_batch(self, batch_size: int = 50) -> int:
+        await self.start()
+        await self.perspective.breaker.wait_until_ready()
+
+        posts = await self.claim_posts(batch_size)
+
+        if not posts:
+            logger.info("No unprocessed posts found")
+            return 0
+
+        logger.info(f"Processing {len(posts)} posts...")
+
+        rows = await self.score_batch(posts)
+        if await self.write_rows(rows, posts) is None:
+            return 0
 
         logger.info(f"Processed {len(posts)} posts")
         return len(posts)
 
     async def process_all_unprocessed(self, batch_size: int = 50):
         total = 0
-        while True:
-            processed = await self.process_batch(batch_size)
-            total += processed
-            if processed < batch_size:
-                break
+        try:
+            while True:
+                processed = await self.process_batch(batch_size)
+                total += processed
+                if processed < batch_size:
+                    break
+        finally:
+            await self.close()
         logger.info(f"Total processed: {total}")
         return total
 
-    async def run_continuous(self, interval_seconds: int = 30):
-        logger.info(f"Starting continuous processing every {interval_seconds} seconds")
+    async def log_backlog(self):
+        stats = await self.get_backlog_stats()
+        logger.info(
+            f"Backlog: {stats['pending']} pending ({stats['retrying']} awaiting retry), "
+            f"oldest {stats['age_seconds']:.0f}s old"
+        )
 
+    async def _fetch_stage(self, score_queue: asyncio.Queue, batch_size: int, interval_seconds: int):
+        idle = 1
+        last_report = 0.0
+        loop = asyncio.get_running_loop()
+        while True:
+            if loop.time() - last_report >= 60:
+                try:
+                    await self.log_backlog()
+                except Exception as e:
+                    logger.error(f"Error reading backlog stats: {e}")
+                last_report = loop.time()
+
+            # Pause claiming while the API is degraded; due retries are
+            # picked up by the normal claim once the breaker closes.
+            await self.perspective.breaker.wait_until_ready()
+            try:
+                posts = await self.claim_posts(batch_size)
+            except Exception as e:
+                logger.error(f"Error claiming posts: {e}")
+                posts = []
+
+            if posts:
+                # Blocks while the scorers are busy, so at most a couple of
+                # batches are prefetched ahead of scoring.
+                await score_queue.put(posts)
+
+            if not posts:
+                # Back off only while there is nothing to claim
+                await asyncio.sleep(idle)
+                idle = min(idle * 2, interval_seconds)
+            else:
+                idle = 1
+                if len(posts) < batch_size:
+                    await asyncio.sleep(idle)
+
+    async def _handoff_stage(self, handoff: asyncio.Queue, score_queue: asyncio.Queue, batch_size: int):
+        while True:
+            # Take whatever has queued up since the last batch, up to batch_size
+            posts = list(await handoff.get())
+            while len(posts) < batch_size and not handoff.empty():
+                posts.extend(handoff.get_nowait())
+
+            try:
+                posts = await self.claim_handoff(posts)
+            except Exception as e:
+                # Left unclaimed, so the recovery sweep picks them up
+                logger.error(f"Error claiming {len(posts)} handed-off posts: {e}")
+                continue
+
+            for start in range(0, len(posts), batch_size):
+                await score_queue.put(posts[start:start + batch_size])
+
+    async def _recovery_stage(self, score_queue: asyncio.Queue, batch_size: int, interval_seconds: int):
+        # With a handoff queue the database is only read to pick up what the
+        # queue never delivered: posts from before a restart, expired leases,
+        # due retries and edited messages.
+        while True:
+            await self.perspective.breaker.wait_until_ready()
+            recovered = 0
+            try:
+                while True:
+                    posts = await self.claim_posts(batch_size)
+                    if posts:
+                        recovered += len(posts)
+                        await score_queue.put(posts)
+                    if len(posts) < batch_size:
+                        break
+            except Exception as e:
+                logger.error(f"Error claiming posts: {e}")
+
+            if recovered:
+                logger.info(f"Recovered {recovered} posts from the database backlog")
+            await asyncio.sleep(interval_seconds)
+
+    async def _score_stage(self, score_queue: asyncio.Queue, write_queue: asyncio.Queue):
+        while True:
+            posts = await score_queue.get()
+            try:
+                rows = await self.score_batch(posts)
+            except Exception as e:
+                # Leases on these posts expire and they are claimed again
+                logger.error(f"Error scoring batch of {len(posts)} posts: {e}")
+                continue
+            await write_queue.put((rows, posts))
+
+    async def _write_stage(self, write_queue: asyncio.Queue):
+        while True:
+            rows, posts = await write_queue.get()
+            written = await self.write_rows(rows, posts) or 0
+            logger.info(
+                f"Processed {written} posts "
+                f"(queued: {write_queue.qsize()} batches awaiting write)"
+            )
+
+    async def run_continuous(
+        self,
+        interval_seconds: int = 30,
+        batch_size: int = 50,
+        scorers: int = 2,
+        handoff: asyncio.Queue = None
+    ):
+        """Score posts until cancelled.
+
+        Without ``handoff`` new posts are found by polling the database. With
+        it, posts come from the queue an in-process scraper fills, and the
+        database is only swept every HANDOFF_RECOVERY_SECONDS.
+        """
+        score_queue = asyncio.Queue(maxsize=scorers)
+        write_queue = asyncio.Queue(maxsize=scorers)
+
+        await self.start()
         try:
-            while True:
-                processed = await self.process_batch()
-                if processed == 0:
-                    await asyncio.sleep(interval_seconds)
+            async with asyncio.TaskGroup() as group:
+                if handoff is None:
+                    logger.info(f"Starting continuous processing (idle poll up to every {interval_seconds} seconds)")
+                    group.create_task(self._fetch_stage(score_queue, batch_size, interval_seconds))
                 else:
-                    await asyncio.sleep(1)
+                    logger.info("Starting continuous processing of handed-off posts")
+                    group.create_task(self._handoff_stage(handoff, score_queue, batch_size))
+                    group.create_task(
+                        self._recovery_stage(score_queue, batch_size, config.HANDOFF_RECOVERY_SECONDS)
+                    )
+                for _ in range(scorers):
+                    group.create_task(self._score_stage(score_queue, write_queue))
+                group.create_task(self._write_stage(write_queue))
+                if self.spike_detector is not None:
+                    group.create_task(self.spike_detector.run())
         except KeyboardInterrupt:
             logger.info("Stopping processor...")
+        finally:
+            await self.close()
 
 
 async def main():
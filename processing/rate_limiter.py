@@ -0,0 +1,65 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateLimiter:
+    """Paces requests at an adaptive rate (AIMD).
+
+    The rate grows additively while requests succeed and is cut
+    multiplicatively when the upstream signals throttling.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        min_rate: float = None,
+        max_rate: float = None,
+        increase_step: float = 0.1,
+        decrease_factor: float = 0.5,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate or rate
+        self.max_rate = max_rate or rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            start = max(now, self._next_slot, self._paused_until)
+            self._next_slot = start + 1.0 / self.rate
+
+        delay = start - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttled(self, retry_after: float = None):
+        now = asyncio.get_running_loop().time()
+
+        # A burst of in-flight requests tends to be throttled together;
+        # only back off once per interval so one burst is one decrease.
+        if now - self._last_decrease >= 1.0 / self.rate:
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._last_decrease = now
+            logger.info(f"Throttled, reducing rate to {self.rate:.2f}/s")
+
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
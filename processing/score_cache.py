@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import re
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from config import config
+from database.bulk import insert_ignore
+from database.connection import async_session
+from database.models import ScoreCacheEntry
+
+logger = logging.getLogger(__name__)
+
+SCORE_FIELDS = {
+    "toxicity": "toxicity_score",
+    "severe_toxicity": "severe_toxicity_score",
+    "identity_attack": "identity_attack_score",
+    "insult": "insult_score",
+    "threat": "threat_score",
+}
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+def cache_key(text: str, language: str | None) -> tuple[str, str]:
+    text_hash = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return text_hash, language or ""
+
+
+class ScoreCache:
+    """Perspective scores keyed by normalized text hash and language.
+
+    An in-process LRU sits in front of the persistent score_cache table.
+    """
+
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size or config.SCORE_CACHE_SIZE
+        self._lru: OrderedDict[tuple[str, str], dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _remember(self, key: tuple[str, str], scores: dict):
+        self._lru[key] = scores
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    async def get_many(self, keys: set[tuple[str, str]]) -> dict[tuple[str, str], dict]:
+        found = {}
+        missing = set()
+
+        for key in keys:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                found[key] = self._lru[key]
+            else:
+                missing.add(key)
+
+        if missing:
+            async with async_session() as session:
+                result = await session.execute(
+                    select(ScoreCacheEntry)
+                    .where(ScoreCacheEntry.text_hash.in_({text_hash for text_hash, _ in missing}))
+                )
+                for entry in result.scalars().all():
+                    key = (entry.text_hash, entry.language)
+                    if key not in missing:
+                        continue
+                    scores = {attr: getattr(entry, column) for attr, column in SCORE_FIELDS.items()}
+                    self._remember(key, scores)
+                    found[key] = scores
+
+        return found
+
+    async def put_many(self, entries: dict[tuple[str, str], dict]):
+        rows = []
+        for (text_hash, language), scores in entries.items():
+            # Never cache failed or rejected lookups
+            if not scores or scores.get("toxicity") is None:
+                continue
+            self._remember((text_hash, language), scores)
+            rows.append({
+                "text_hash": text_hash,
+                "language": language,
+                **{column: scores.get(attr) for attr, column in SCORE_FIELDS.items()}
+            })
+
+        if not rows:
+            return
+
+        async with async_session() as session:
+            await insert_ignore(session, ScoreCacheEntry, rows, ["text_hash", "language"])
+            await session.commit()
+
+    def record(self, hits: int, misses: int):
+        self.hits += hits
+        self.misses += misses
@@ -1,3 +1,8 @@
 from scraper.telegram_scraper import TelegramScraper
+from scraper.realtime import RealtimeIngestor
+from scraper.scheduler import PollScheduler
+from scraper.backfill import Backfiller
+from scraper.sharding import HashRing
+from scraper.session_pool import SessionPool
 
-__all__ = ["TelegramScraper"]
+__all__ = ["TelegramScraper", "RealtimeIngestor", "PollScheduler", "Backfiller", "HashRing", "SessionPool"]
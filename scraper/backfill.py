@@ -0,0 +1,191 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import select, update
+from telethon import errors
+
+from config import config
+from database.bulk import bulk_insert_posts, insert_ignore
+from database.connection import async_session
+from database.models import BackfillChunk
+
+logger = logging.getLogger(__name__)
+
+
+class Backfiller:
+    """Fetches channel history for a date range in resumable chunks.
+
+    Each channel's range is split into ``chunk_days`` windows, recorded in
+    ``backfill_chunks``. Chunks are fetched concurrently, newest message
+    first, and every page of messages is committed together with the
+    chunk's cursor. Running again with the same range skips finished chunks
+    and resumes interrupted ones from their cursor.
+    """
+
+    PAGE_SIZE = 100
+
+    def __init__(
+        self,
+        scraper,
+        since: datetime,
+        until: datetime,
+        chunk_days: int = 7,
+        concurrency: int = None,
+        on_chunk_done: Callable[[BackfillChunk], None] = None
+    ):
+        self.scraper = scraper
+        self.since = since
+        self.until = until
+        self.chunk_days = chunk_days
+        self.semaphore = asyncio.Semaphore(concurrency or config.SCRAPE_CONCURRENCY)
+        self.on_chunk_done = on_chunk_done
+        self.usernames: dict[int, str] = {}
+
+    def chunk_ranges(self) -> list[tuple[datetime, datetime]]:
+        ranges = []
+        start = self.since
+        while start < self.until:
+            end = min(start + timedelta(days=self.chunk_days), self.until)
+            ranges.append((start, end))
+            start = end
+        return ranges
+
+    async def plan(self) -> list[tuple[BackfillChunk, object]]:
+        """Create the chunk rows for every channel and return the unfinished ones."""
+        refs = {}
+        async with async_session() as session:
+            for channel_config in self.scraper.load_channels_config():
+                username = channel_config.get("username")
+                if not username:
+                    continue
+                try:
+                    ref = await self.scraper.resolve_channel(session, username, channel_config)
+                except Exception as e:
+                    logger.error(f"Could not resolve {username}: {e}")
+                    continue
+                if ref:
+                    refs[ref.id] = ref
+                    self.usernames[ref.id] = username
+
+            await insert_ignore(
+                session,
+                BackfillChunk,
+                [
+                    {"channel_id": channel_id, "start_date": start, "end_date": end, "status": "pending"}
+                    for channel_id in refs
+                    for start, end in self.chunk_ranges()
+                ],
+                ["channel_id", "start_date", "end_date"]
+            )
+            await session.commit()
+
+            result = await session.execute(
+                select(BackfillChunk)
+                .where(BackfillChunk.channel_id.in_(list(refs)))
+                .where(BackfillChunk.start_date >= self.since)
+                .where(BackfillChunk.end_date <= self.until)
+                .where(BackfillChunk.status != "done")
+                .order_by(BackfillChunk.end_date.desc())
+            )
+            chunks = result.scalars().all()
+
+        return [(chunk, refs[chunk.channel_id]) for chunk in chunks]
+
+    async def _save(self, session, chunk: BackfillChunk, rows: list[dict], **values):
+        inserted = await bulk_insert_posts(session, rows)
+        chunk.messages_saved = (chunk.messages_saved or 0) + len(inserted)
+        await session.execute(
+            update(BackfillChunk)
+            .where(BackfillChunk.id == chunk.id)
+            .values(messages_saved=chunk.messages_saved, updated_at=datetime.utcnow(), **values)
+        )
+        await session.commit()
+        await self.scraper.hand_off(inserted)
+
+    async def _fetch_chunk(self, chunk: BackfillChunk, ref):
+        # History is returned newest first: start at the chunk's end date,
+        # or just below the oldest message already stored.
+        if chunk.cursor_id:
+            kwargs = {"offset_id": chunk.cursor_id}
+        else:
+            kwargs = {"offset_date": chunk.end_date}
+
+        rows = []
+        seen = 0
+
+        async with async_session() as session:
+            await session.execute(
+                update(BackfillChunk)
+                .where(BackfillChunk.id == chunk.id)
+                .values(status="running", updated_at=datetime.utcnow())
+            )
+            await session.commit()
+
+            async for message in self.scraper._iter_messages(ref.peer, **kwargs):
+                if message.date.replace(tzinfo=None) < chunk.start_date:
+                    break
+
+                if message.text:
+                    rows.append(self.scraper.message_row(message, ref.id))
+                seen += 1
+                if seen % self.PAGE_SIZE == 0:
+                    await self._save(session, chunk, rows, cursor_id=message.id)
+                    chunk.cursor_id = message.id
+                    rows = []
+
+            await self._save(session, chunk, rows, status="done")
+            chunk.status = "done"
+
+    async def run_chunk(self, chunk: BackfillChunk, ref) -> int:
+        username = self.usernames.get(chunk.channel_id, chunk.channel_id)
+        label = f"{username} {chunk.start_date:%Y-%m-%d}..{chunk.end_date:%Y-%m-%d}"
+        saved_before = chunk.messages_saved or 0
+
+        for attempt in range(self.scraper.max_flood_retries + 1):
+            try:
+                async with self.semaphore:
+                    await self._fetch_chunk(chunk, ref)
+                self.scraper.limiter.on_success()
+                break
+            except errors.FloodWaitError as e:
+                # Progress up to the last page is saved; the retry resumes there
+                self.scraper.on_flood_wait(e.seconds)
+                logger.warning(f"FloodWait of {e.seconds}s on {label}, pausing this chunk")
+                await asyncio.sleep(e.seconds)
+            except Exception as e:
+                logger.error(f"Backfill of {label} failed: {e}")
+                await self._mark_failed(chunk)
+                return chunk.messages_saved - saved_before
+        else:
+            logger.error(f"Giving up on {label} after {self.scraper.max_flood_retries + 1} flood waits")
+            await self._mark_failed(chunk)
+            return chunk.messages_saved - saved_before
+
+        saved = chunk.messages_saved - saved_before
+        logger.info(f"Backfilled {saved} messages for {label}")
+        if self.on_chunk_done:
+            self.on_chunk_done(chunk)
+        return saved
+
+    async def _mark_failed(self, chunk: BackfillChunk):
+        async with async_session() as session:
+            await session.execute(
+                update(BackfillChunk)
+                .where(BackfillChunk.id == chunk.id)
+                .values(status="failed", updated_at=datetime.utcnow())
+            )
+            await session.commit()
+
+    async def run(self) -> dict[str, int]:
+        """Backfill every unfinished chunk. Returns new messages per channel."""
+        chunks = await self.plan()
+        logger.info(f"Backfilling {len(chunks)} chunks")
+
+        counts = await asyncio.gather(*(self.run_chunk(chunk, ref) for chunk, ref in chunks))
+
+        results = {username: 0 for username in self.usernames.values()}
+        for (chunk, _), count in zip(chunks, counts):
+            results[self.usernames[chunk.channel_id]] += count
+        return results
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+
+from sqlalchemy import bindparam, case, update
+from telethon import events
+from telethon.tl.types import InputPeerChannel
+
+from config import config
+from database.bulk import bulk_insert_posts
+from database.connection import async_session
+from database.models import Channel, Post
+from database.rollups import ROLLUP_SOURCE_COLUMNS, apply_rollup_deltas, rollup_deltas
+from scraper.telegram_scraper import ChannelRef
+
+logger = logging.getLogger(__name__)
+
+
+class RealtimeIngestor:
+    """Ingests channel messages as Telegram pushes them.
+
+    NewMessage and MessageEdited events are buffered and written to the
+    database in small batches. Incremental polling only runs to fill the gap
+    after the client (re)connects.
+    """
+
+    def __init__(self, scraper, flush_interval: float = None, watchdog_interval: float = 5.0):
+        self.scraper = scraper
+        self.client = scraper.client
+        self.flush_interval = flush_interval or config.REALTIME_FLUSH_MS / 1000
+        self.watchdog_interval = watchdog_interval
+
+        # Telegram channel id -> resolved channel
+        self.channels: dict[int, ChannelRef] = {}
+        self._new_messages = []
+        self._edited_messages = []
+        self._connected = False
+        self._caught_up = False
+
+    async def resolve_channels(self) -> list[InputPeerChannel]:
+        peers = []
+
+        async with async_session() as session:
+            for channel_config in self.scraper.load_channels_config():
+                username = channel_config.get("username")
+                if not username:
+                    continue
+
+                try:
+                    ref = await self.scraper.resolve_channel(session, username, channel_config)
+                except Exception as e:
+                    logger.error(f"Could not resolve {username}: {e}")
+                    continue
+
+                if ref:
+                    self.channels[ref.telegram_id] = ref
+                    peers.append(ref.peer)
+
+        return peers
+
+    async def _on_new_message(self, event):
+        self._new_messages.append(event.message)
+
+    async def _on_message_edited(self, event):
+        self._edited_messages.append(event.message)
+
+    def _channel_id(self, message) -> int | None:
+        ref = self.channels.get(getattr(message.peer_id, "channel_id", None))
+        return ref.id if ref else None
+
+    async def flush(self) -> int:
+        new_messages, self._new_messages = self._new_messages, []
+        edited_messages, self._edited_messages = self._edited_messages, []
+
+        rows = []
+        newest: dict[int, int] = {}
+        for message in new_messages:
+            channel_id = self._channel_id(message)
+            if channel_id is None:
+                continue
+            newest[channel_id] = max(newest.get(channel_id, 0), message.id)
+            if message.text:
+                rows.append(self.scraper.message_row(message, channel_id))
+
+        edits = []
+        for message in edited_messages:
+            channel_id = self._channel_id(message)
+            if channel_id is not None and message.text:
+                edits.append({
+                    "b_channel_id": channel_id,
+                    "b_message_id": message.id,
+                    "b_text": message.text
+                })
+
+        # Until the post-connect catch-up has run, a checkpoint advanced by
+        # live events could jump over messages missed while disconnected.
+        if not self._caught_up:
+            newest = {}
+
+        if not rows and not edits and not newest:
+            return 0
+
+        try:
+            inserted = await self._write(rows, edits, newest)
+        except Exception:
+            # Keep the messages for the next flush
+            self._new_messages[:0] = new_messages
+            self._edited_messages[:0] = edited_messages
+            raise
+
+        if inserted or edits:
+            logger.info(f"Realtime: stored {len(inserted)} new and {len(edits)} edited messages")
+        return len(inserted)
+
+    async def _write(self, rows: list[dict], edits: list[dict], newest: dict[int, int]) -> list:
+        async with async_session() as session:
+            inserted = await bulk_insert_posts(session, rows)
+
+            if edits:
+                # Edited text is queued for scoring again; the previous
+                # scores stay until it has been re-scored, but the post
+                # leaves the hourly rollups until then.
+                unscored = []
+                for edit in edits:
+                    result = await session.execute(
+                        update(Post)
+                        .where(Post.channel_id == edit["b_channel_id"])
+                        .where(Post.telegram_message_id == edit["b_message_id"])
+                        .where(Post.processed_at.isnot(None))
+                        .values(text=edit["b_text"], processed_at=None)
+                        .returning(*ROLLUP_SOURCE_COLUMNS)
+                        .execution_options(synchronize_session=False)
+                    )
+                    unscored.extend(dict(row._mapping) for row in result.all())
+                await apply_rollup_deltas(session, rollup_deltas(unscored, sign=-1))
+
+                # Posts still waiting for their first score only get the new text
+                posts = Post.__table__
+                await session.execute(
+                    update(posts)
+                    .where(posts.c.channel_id == bindparam("b_channel_id"))
+                    .where(posts.c.telegram_message_id == bindparam("b_message_id"))
+                    .where(posts.c.processed_at.is_(None))
+                    .values(text=bindparam("b_text")),
+                    edits
+                )
+
+            for channel_id, message_id in newest.items():
+                await session.execute(
+                    update(Channel)
+                    .where(Channel.id == channel_id)
+                    .values(last_message_id=case(
+                        (Channel.last_message_id.is_(None), message_id),
+                        (Channel.last_message_id < message_id, message_id),
+                        else_=Channel.last_message_id
+                    ))
+                )
+
+            await session.commit()
+
+        for ref in self.channels.values():
+            if ref.id in newest:
+                ref.last_message_id = max(newest[ref.id], ref.last_message_id or 0)
+
+        await self.scraper.hand_off(inserted)
+        return inserted
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Realtime flush failed: {e}")
+
+    async def _watchdog_loop(self):
+        # Updates missed while disconnected are fetched by an incremental
+        # scrape from each channel's checkpoint once the client is back.
+        while True:
+            connected = self.client.is_connected()
+            if connected and not self._connected:
+                logger.info("Connected, catching up from checkpoints...")
+                results = await self.scraper.scrape_all_channels()
+                self._caught_up = True
+                logger.info(f"Catch-up complete: {sum(results.values())} messages")
+            elif not connected and self._connected:
+                self._caught_up = False
+                logger.warning("Disconnected from Telegram, waiting for reconnect...")
+            self._connected = connected
+            await asyncio.sleep(self.watchdog_interval)
+
+    async def run(self):
+        peers = await self.resolve_channels()
+        if not peers:
+            logger.error("No channels to listen to")
+            return
+
+        self.client.add_event_handler(self._on_new_message, events.NewMessage(chats=peers))
+        self.client.add_event_handler(self._on_message_edited, events.MessageEdited(chats=peers))
+        logger.info(f"Listening for messages on {len(peers)} channels")
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._flush_loop())
+                group.create_task(self._watchdog_loop())
+        finally:
+            await self.flush()
@@ -0,0 +1,145 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from config import config
+from database.connection import async_session
+from database.models import Channel, Post
+
+logger = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Decides when each channel is next polled, based on how active it is.
+
+    Each channel's message rate is seeded from its recent posts and then
+    smoothed (EWMA) with what every poll finds. A channel's base interval is
+    the time ``target_per_poll`` new messages take, clamped to
+    [min_interval, max_interval], which sets how often it is polled
+    relative to the others. All intervals are then scaled together so the
+    channels use the global poll budget: stretched when it would be
+    exceeded, shrunk (down to min_interval) when there is budget to spare.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = None,
+        max_interval: float = None,
+        default_interval: float = None,
+        budget_per_minute: float = None,
+        target_per_poll: float = 5.0,
+        smoothing: float = 0.3
+    ):
+        self.min_interval = min_interval or config.SCRAPE_MIN_INTERVAL_SECONDS
+        self.max_interval = max_interval or config.SCRAPE_MAX_INTERVAL_MINUTES * 60
+        self.default_interval = default_interval or config.SCRAPE_INTERVAL_MINUTES * 60
+        self.budget_per_minute = budget_per_minute or config.SCRAPE_POLL_BUDGET_PER_MINUTE
+        self.target_per_poll = target_per_poll
+        self.smoothing = smoothing
+
+        self.usernames: list[str] = []
+        self.rates: dict[str, float] = {}
+        self.last_polled: dict[str, float] = {}
+        self._queue: list[tuple[float, str]] = []
+        self._scale = 1.0
+        self._wakeup = asyncio.Event()
+
+    async def load_rates(self, usernames: list[str], hours: int = 24):
+        cutoff = datetime.utcnow() - timedelta(hours=hours)
+
+        async with async_session() as session:
+            result = await session.execute(
+                select(func.lower(Channel.username), func.count(Post.id))
+                .join(Post, Post.channel_id == Channel.id)
+                .where(Post.posted_at >= cutoff)
+                .group_by(func.lower(Channel.username))
+            )
+            counts = dict(result.all())
+
+        self.usernames = list(usernames)
+        for username in usernames:
+            count = counts.get(username.lower())
+            if count is not None:
+                self.rates[username] = count / (hours * 3600)
+
+        self._rebalance()
+        logger.info(f"Seeded activity rates for {len(counts)} of {len(usernames)} channels")
+
+    def _base_interval(self, username: str) -> float:
+        rate = self.rates.get(username)
+        if rate is None:
+            return self.default_interval
+        if rate <= 0:
+            return self.max_interval
+        return min(max(self.target_per_poll / rate, self.min_interval), self.max_interval)
+
+    def _rebalance(self):
+        # Find the scale at which the channels use exactly the budget. Channels
+        # that would go below min_interval are held there and their polls
+        # come off the budget the rest share, which can push more channels
+        # under it; repeat until that set stops growing.
+        bases = sorted(self._base_interval(username) for username in self.usernames)
+        floored = 0
+        scale = 1.0
+        while floored < len(bases):
+            budget = self.budget_per_minute - floored * 60 / self.min_interval
+            if budget <= 0:
+                break
+            scale = sum(60 / base for base in bases[floored:]) / budget
+            below = bisect.bisect_left(bases, self.min_interval / scale)
+            if below <= floored:
+                break
+            floored = below
+        self._scale = scale
+
+    def interval(self, username: str) -> float:
+        return max(self._base_interval(username) * self._scale, self.min_interval)
+
+    def schedule(self, username: str, delay: float = None):
+        if delay is None:
+            delay = self.interval(username)
+        heapq.heappush(self._queue, (time.monotonic() + delay, username))
+        self._wakeup.set()
+
+    def record(self, username: str, new_messages: int):
+        now = time.monotonic()
+        last = self.last_polled.get(username)
+        self.last_polled[username] = now
+
+        if last is None:
+            return
+
+        observed = new_messages / max(now - last, 1.0)
+        previous = self.rates.get(username)
+        if previous is None:
+            self.rates[username] = observed
+        else:
+            self.rates[username] = (1 - self.smoothing) * previous + self.smoothing * observed
+        self._rebalance()
+
+    async def next_due(self) -> list[str]:
+        while True:
+            self._wakeup.clear()
+            if self._queue:
+                wait = self._queue[0][0] - time.monotonic()
+                if wait <= 0:
+                    break
+            else:
+                wait = None
+
+            # Sleep until the earliest poll is due or something new is scheduled
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+        due = []
+        now = time.monotonic()
+        while self._queue and self._queue[0][0] <= now:
+            due.append(heapq.heappop(self._queue)[1])
+        return due
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from typing import Callable
+
+from config import config
+from scraper.sharding import HashRing
+from scraper.telegram_scraper import TelegramScraper
+
+logger = logging.getLogger(__name__)
+
+
+class SessionPool:
+    """Runs one TelegramScraper per session, each owning a shard of the channels.
+
+    Channels are assigned to sessions through a HashRing, so each session
+    keeps a stable set of channels (and its own flood budget) and only a
+    fraction of them move when a session is added to or removed from
+    TELEGRAM_SESSIONS. Shards are assigned when the scrapers start, so such
+    a change takes effect when the processes are restarted.
+    ``owned`` limits this process to some of the sessions, so the shards
+    can also run as separate processes. ``client_factory`` builds the
+    client for a session name; it defaults to a TelegramClient and can be
+    replaced by a fake one.
+    """
+
+    def __init__(
+        self,
+        sessions: list[str] = None,
+        owned: list[str] = None,
+        client_factory: Callable[[str], object] = None
+    ):
+        self.client_factory = client_factory
+        self.ring = HashRing(sessions or config.TELEGRAM_SESSIONS)
+
+        unknown = set(owned or []) - set(self.ring.nodes)
+        if unknown:
+            raise ValueError(f"Unknown sessions: {', '.join(sorted(unknown))}")
+
+        self.scrapers: dict[str, TelegramScraper] = {}
+        for name in owned or self.ring.nodes:
+            self.scrapers[name] = self._make_scraper(name)
+
+    def _make_scraper(self, name: str) -> TelegramScraper:
+        client = self.client_factory(name) if self.client_factory else None
+        return TelegramScraper(session_name=name, client=client, ring=self.ring)
+
+    def scraper_for(self, channel_username: str) -> TelegramScraper | None:
+        name = self.ring.node_for(channel_username.lower())
+        return self.scrapers.get(name)
+
+    async def start(self):
+        await asyncio.gather(*(scraper.start() for scraper in self.scrapers.values()))
+
+    async def stop(self):
+        await asyncio.gather(*(scraper.stop() for scraper in self.scrapers.values()))
+
+    async def scrape_all_channels(self, limit: int = 100, incremental: bool = True) -> dict:
+        results = await asyncio.gather(*(
+            scraper.scrape_all_channels(limit, incremental) for scraper in self.scrapers.values()
+        ))
+        merged = {}
+        for result in results:
+            merged.update(result)
+        return merged
+
+    async def run_continuous(self, interval_minutes: int = None):
+        await asyncio.gather(*(
+            scraper.run_continuous(interval_minutes) for scraper in self.scrapers.values()
+        ))
+
+    def stats(self) -> list[dict]:
+        return [scraper.stats() for scraper in self.scrapers.values()]
+
+    def log_stats(self):
+        for stats in self.stats():
+            logger.info(
+                f"Session {stats['session']}: {stats['channels']} channels, "
+                f"{stats['rate']:.2f} req/s, {stats['flood_waits']} flood waits "
+                f"({stats['flood_wait_seconds']}s)"
+            )
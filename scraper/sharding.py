@@ -0,0 +1,46 @@
+import bisect
+import hashlib
+
+
+class HashRing:
+    """Consistent hash ring assigning channels to Telegram sessions.
+
+    Every session is placed on the ring ``replicas`` times. A channel
+    belongs to the first session point at or after its own hash, so adding
+    or removing a session only moves the channels next to its points.
+    """
+
+    def __init__(self, nodes: list[str] = (), replicas: int = 100):
+        self.replicas = replicas
+        self._points: list[int] = []
+        self._nodes: dict[int, str] = {}
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int(hashlib.md5(key.encode()).hexdigest()[:16], 16)
+
+    @property
+    def nodes(self) -> list[str]:
+        return sorted(set(self._nodes.values()))
+
+    def add(self, node: str):
+        for i in range(self.replicas):
+            point = self._hash(f"{node}#{i}")
+            if point not in self._nodes:
+                bisect.insort(self._points, point)
+                self._nodes[point] = node
+
+    def remove(self, node: str):
+        for i in range(self.replicas):
+            point = self._hash(f"{node}#{i}")
+            if self._nodes.get(point) == node:
+                del self._nodes[point]
+                self._points.remove(point)
+
+    def node_for(self, key: str) -> str | None:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._points)
+        return self._nodes[self._points[index]]
@@ -4,42 +4,122 @@ import logging
 from datetime import datetime
 from pathlib import Path
 
-from telethon import TelegramClient
-from telethon.tl.types import Channel as TelegramChannel
-from sqlalchemy import select
-from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from telethon import TelegramClient, errors
+from telethon.tl.types import Channel as TelegramChannel, InputPeerChannel
+from sqlalchemy import func, select, update
 
 from config import config
+from database.bulk import bulk_insert_posts
 from database.connection import async_session
-from database.models import Channel, Post
+from database.models import Channel
+from processing.rate_limiter import AdaptiveRateLimiter
+from scraper.scheduler import PollScheduler
+from scraper.sharding import HashRing
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Errors that mean a cached InputPeerChannel no longer works
+STALE_PEER_ERRORS = (errors.ChannelInvalidError, errors.PeerIdInvalidError)
+
+
+class ChannelRef:
+    """What the scraper needs to know about a channel it has resolved."""
+
+    def __init__(self, id: int, telegram_id: int, access_hash: int, last_message_id: int | None):
+        self.id = id
+        self.telegram_id = telegram_id
+        self.access_hash = access_hash
+        self.last_message_id = last_message_id
+
+    @property
+    def peer(self) -> InputPeerChannel:
+        return InputPeerChannel(self.telegram_id, self.access_hash)
+
 
 class TelegramScraper:
-    def __init__(self):
-        self.client = TelegramClient(
-            "hatewatch_session",
+    def __init__(self, session_name: str = None, client=None, ring: HashRing = None):
+        self.session_name = session_name or config.TELEGRAM_SESSIONS[0]
+        self.client = client or TelegramClient(
+            self.session_name,
             config.TELEGRAM_API_ID,
-            config.TELEGRAM_API_HASH
+            config.TELEGRAM_API_HASH,
+            flood_sleep_threshold=config.TELEGRAM_FLOOD_SLEEP_THRESHOLD
         )
         self.channels_file = Path(__file__).parent / "channels.json"
 
+        # With a ring, only the channels hashed to this session are scraped
+        self.ring = ring
+
+        # Request budget of this session, shared by all its concurrent scrapes
+        self.limiter = AdaptiveRateLimiter(
+            rate=config.TELEGRAM_REQUESTS_PER_SECOND,
+            min_rate=config.TELEGRAM_REQUESTS_PER_SECOND / 4,
+            max_rate=config.TELEGRAM_REQUESTS_PER_SECOND
+        )
+        self.semaphore = asyncio.Semaphore(config.SCRAPE_CONCURRENCY)
+        self.max_flood_retries = 3
+        self.flood_waits = 0
+        self.flood_wait_seconds = 0
+
+        # When set, newly inserted posts are also pushed here for an
+        # in-process ProcessingPipeline to score
+        self.handoff: asyncio.Queue | None = None
+
+        # Resolved channels, by configured username and by Telegram id
+        self.channels: dict[str, ChannelRef] = {}
+        self.channels_by_telegram_id: dict[int, ChannelRef] = {}
+
     async def start(self):
-        await self.client.start(phone=config.TELEGRAM_PHONE)
-        logger.info("Telegram client started")
+        # TELEGRAM_PHONE logs in the first session; others prompt on first use
+        if self.session_name == config.TELEGRAM_SESSIONS[0]:
+            await self.client.start(phone=config.TELEGRAM_PHONE)
+        else:
+            await self.client.start()
+        logger.info(f"Telegram client started ({self.session_name})")
 
     async def stop(self):
         await self.client.disconnect()
-        logger.info("Telegram client disconnected")
+        logger.info(f"Telegram client disconnected ({self.session_name})")
 
     def load_channels_config(self) -> list[dict]:
         with open(self.channels_file) as f:
             data = json.load(f)
-        return data.get("channels", [])
+        channels = data.get("channels", [])
+
+        if self.ring is None:
+            return channels
+        return [
+            channel_config for channel_config in channels
+            if channel_config.get("username")
+            and self.ring.node_for(channel_config["username"].lower()) == self.session_name
+        ]
+
+    async def hand_off(self, posts: list):
+        # Called after the insert is committed, so the processor can claim them.
+        # Waits while the queue is full, slowing scraping to the scoring rate.
+        if self.handoff is not None and posts:
+            await self.handoff.put(posts)
+
+    def on_flood_wait(self, seconds: int):
+        self.flood_waits += 1
+        self.flood_wait_seconds += seconds
+        self.limiter.on_throttled()
+
+    def stats(self) -> dict:
+        return {
+            "session": self.session_name,
+            "channels": len(self.channels),
+            "rate": self.limiter.rate,
+            "flood_waits": self.flood_waits,
+            "flood_wait_seconds": self.flood_wait_seconds,
+        }
+
+    async def get_or_create_channel(self, session, entity: TelegramChannel, channel_config: dict) -> ChannelRef:
+        ref = self.channels_by_telegram_id.get(entity.id)
+        if ref:
+            return ref
 
-    async def get_or_create_channel(self, session, entity: TelegramChannel, channel_config: dict) -> Channel:
         result = await session.execute(
             select(Channel).where(Channel.telegram_id == entity.id)
         )
@@ -47,10 +127,12 @@ class TelegramScraper:
 
         if channel:
             channel.member_count = getattr(entity, "participants_count", None)
+            channel.access_hash = entity.access_hash
             channel.updated_at = datetime.utcnow()
         else:
             channel = Channel(
                 telegram_id=entity.id,
+                access_hash=entity.access_hash,
                 username=entity.username,
                 title=entity.title,
                 member_count=getattr(entity, "participants_count", None),
@@ -60,79 +142,221 @@ class TelegramScraper:
                 is_active=True
             )
             session.add(channel)
-            await session.flush()
+        await session.flush()
 
-        return channel
+        ref = ChannelRef(channel.id, channel.telegram_id, channel.access_hash, channel.last_message_id)
+        self.channels_by_telegram_id[entity.id] = ref
+        return ref
 
-    async def scrape_channel(self, channel_username: str, channel_config: dict, limit: int = 100) -> int:
-        try:
-            entity = await self.client.get_entity(channel_username)
-            if not isinstance(entity, TelegramChannel):
-                logger.warning(f"{channel_username} is not a channel")
-                return 0
+    async def resolve_channel(
+        self,
+        session,
+        channel_username: str,
+        channel_config: dict,
+        refresh: bool = False
+    ) -> ChannelRef | None:
+        key = channel_username.lower()
+
+        if not refresh:
+            if key in self.channels:
+                return self.channels[key]
+
+            # A peer resolved by an earlier run can be reused without an RPC
+            result = await session.execute(
+                select(Channel)
+                .where(func.lower(Channel.username) == key)
+                .where(Channel.access_hash.isnot(None))
+            )
+            channel = result.scalars().first()
+            if channel:
+                ref = ChannelRef(channel.id, channel.telegram_id, channel.access_hash, channel.last_message_id)
+                self.channels[key] = ref
+                self.channels_by_telegram_id[ref.telegram_id] = ref
+                return ref
 
+        # Username resolution is heavily flood-limited; only done when the
+        # channel is new or its cached peer stopped working.
+        await self.limiter.acquire()
+        entity = await self.client.get_entity(channel_username)
+        if not isinstance(entity, TelegramChannel):
+            logger.warning(f"{channel_username} is not a channel")
+            return None
+
+        self.channels_by_telegram_id.pop(entity.id, None)
+        ref = await self.get_or_create_channel(session, entity, channel_config)
+        await session.commit()
+        self.channels[key] = ref
+        return ref
+
+    def forget_channel(self, channel_username: str):
+        ref = self.channels.pop(channel_username.lower(), None)
+        if ref:
+            self.channels_by_telegram_id.pop(ref.telegram_id, None)
+
+    def message_row(self, message, channel_id: int) -> dict:
+        return {
+            "telegram_message_id": message.id,
+            "channel_id": channel_id,
+            "text": message.text,
+            # Telethon dates are timezone-aware UTC; columns store naive UTC
+            "posted_at": message.date.replace(tzinfo=None),
+            "views": message.views,
+            "forwards": message.forwards,
+            "scraped_at": datetime.utcnow()
+        }
+
+    async def _iter_messages(self, entity, **kwargs):
+        # Telethon fetches history in pages of up to 100 messages; spend one
+        # unit of the request budget per page.
+        await self.limiter.acquire()
+        count = 0
+        async for message in self.client.iter_messages(entity, **kwargs):
+            yield message
+            count += 1
+            if count % 100 == 0:
+                await self.limiter.acquire()
+
+    async def scrape_channel(
+        self,
+        channel_username: str,
+        channel_config: dict,
+        limit: int = 100,
+        incremental: bool = True
+    ) -> int:
+        try:
             async with async_session() as session:
-                channel = await self.get_or_create_channel(session, entity, channel_config)
-
-                messages_saved = 0
-                async for message in self.client.iter_messages(entity, limit=limit):
-                    if not message.text:
-                        continue
-
-                    stmt = sqlite_insert(Post).values(
-                        telegram_message_id=message.id,
-                        channel_id=channel.id,
-                        text=message.text,
-                        posted_at=message.date,
-                        views=message.views,
-                        forwards=message.forwards,
-                        scraped_at=datetime.utcnow()
-                    ).on_conflict_do_nothing(
-                        index_elements=["channel_id", "telegram_message_id"]
-                    )
-
-                    result = await session.execute(stmt)
-                    if result.rowcount > 0:
-                        messages_saved += 1
-
-                await session.commit()
-                logger.info(f"Scraped {messages_saved} new messages from {channel_username}")
-                return messages_saved
+                ref = await self.resolve_channel(session, channel_username, channel_config)
+                if ref is None:
+                    return 0
+
+                try:
+                    saved = await self._scrape_messages(session, ref, limit, incremental)
+                except STALE_PEER_ERRORS as e:
+                    logger.info(f"Cached peer for {channel_username} is stale ({e}), resolving again")
+                    await session.rollback()
+                    self.forget_channel(channel_username)
+                    ref = await self.resolve_channel(session, channel_username, channel_config, refresh=True)
+                    if ref is None:
+                        return 0
+                    saved = await self._scrape_messages(session, ref, limit, incremental)
+
+                logger.info(f"Scraped {saved} new messages from {channel_username}")
+                return saved
 
+        except errors.FloodWaitError:
+            raise
         except Exception as e:
             logger.error(f"Error scraping {channel_username}: {e}")
             return 0
 
-    async def scrape_all_channels(self, limit: int = 100) -> dict:
-        channels_config = self.load_channels_config()
-        results = {}
+    async def _scrape_messages(self, session, ref: ChannelRef, limit: int, incremental: bool) -> int:
+        # With a checkpoint, page forward from it until caught up; the
+        # first scrape (or a non-incremental one) takes the latest `limit`.
+        checkpoint = ref.last_message_id or 0
+        if incremental and checkpoint:
+            messages = self._iter_messages(ref.peer, min_id=checkpoint, reverse=True)
+        else:
+            messages = self._iter_messages(ref.peer, limit=limit)
 
-        for channel_config in channels_config:
-            username = channel_config.get("username")
-            if not username:
-                continue
+        ascending = bool(incremental and checkpoint)
+        messages_saved = 0
+        newest = checkpoint
+        rows = []
 
-            count = await self.scrape_channel(username, channel_config, limit)
-            results[username] = count
-            await asyncio.sleep(2)
+        async def flush(checkpoint_reached: bool):
+            nonlocal messages_saved, rows
+            inserted = await bulk_insert_posts(session, rows)
+            messages_saved += len(inserted)
+            rows = []
+            if checkpoint_reached and newest > (ref.last_message_id or 0):
+                await session.execute(
+                    update(Channel)
+                    .where(Channel.id == ref.id)
+                    .values(last_message_id=newest)
+                )
+            await session.commit()
+            if checkpoint_reached:
+                ref.last_message_id = max(newest, ref.last_message_id or 0)
+            await self.hand_off(inserted)
 
-        return results
+        async for message in messages:
+            newest = max(newest, message.id)
+            if message.text:
+                rows.append(self.message_row(message, ref.id))
+            if len(rows) >= 100:
+                # Oldest-first paging can checkpoint as it goes
+                await flush(checkpoint_reached=ascending)
+
+        await flush(checkpoint_reached=True)
+        return messages_saved
+
+    async def scrape_channel_with_flood_wait(
+        self,
+        channel_username: str,
+        channel_config: dict,
+        limit: int = 100,
+        incremental: bool = True
+    ) -> int:
+        for attempt in range(self.max_flood_retries + 1):
+            try:
+                async with self.semaphore:
+                    count = await self.scrape_channel(channel_username, channel_config, limit, incremental)
+                self.limiter.on_success()
+                return count
+            except errors.FloodWaitError as e:
+                # Only this channel waits; its concurrency slot is released
+                # so the rest of the cycle carries on.
+                self.on_flood_wait(e.seconds)
+                logger.warning(f"FloodWait of {e.seconds}s on {channel_username}, pausing this channel")
+                await asyncio.sleep(e.seconds)
+
+        logger.error(f"Giving up on {channel_username} after {self.max_flood_retries + 1} flood waits")
+        return 0
+
+    async def scrape_all_channels(self, limit: int = 100, incremental: bool = True) -> dict:
+        usernames = []
+        configs = []
+        for channel_config in self.load_channels_config():
+            username = channel_config.get("username")
+            if username:
+                usernames.append(username)
+                configs.append(channel_config)
+
+        counts = await asyncio.gather(*(
+            self.scrape_channel_with_flood_wait(username, channel_config, limit, incremental)
+            for username, channel_config in zip(usernames, configs)
+        ))
+        return dict(zip(usernames, counts))
 
     async def run_continuous(self, interval_minutes: int = None):
         if interval_minutes is None:
             interval_minutes = config.SCRAPE_INTERVAL_MINUTES
 
+        configs = {
+            channel_config["username"]: channel_config
+            for channel_config in self.load_channels_config()
+            if channel_config.get("username")
+        }
+        scheduler = PollScheduler(default_interval=interval_minutes * 60)
+        await scheduler.load_rates(list(configs))
+
         await self.start()
-        logger.info(f"Starting continuous scraping every {interval_minutes} minutes")
+        logger.info(f"Starting adaptive scraping of {len(configs)} channels")
 
-        try:
-            while True:
-                logger.info("Starting scrape cycle...")
-                results = await self.scrape_all_channels()
-                total = sum(results.values())
-                logger.info(f"Scrape cycle complete. Total new messages: {total}")
+        async def poll(username: str):
+            count = await self.scrape_channel_with_flood_wait(username, configs[username])
+            scheduler.record(username, count)
+            scheduler.schedule(username)
+            logger.debug(f"Next poll of {username} in {scheduler.interval(username):.0f}s")
 
-                await asyncio.sleep(interval_minutes * 60)
+        for username in configs:
+            scheduler.schedule(username, delay=0)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                while True:
+                    for username in await scheduler.next_due():
+                        group.create_task(poll(username))
         except KeyboardInterrupt:
             logger.info("Stopping scraper...")
         finally:
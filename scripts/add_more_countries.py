@@ -11,6 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from database.connection import init_db, async_session
 from database.models import Channel, Post, Spike, SpikePost
+from database.rollups import rebuild_rollups
 
 
 async def add_countries():
@@ -215,6 +216,7 @@ async def add_countries():
 
         print("Created 2 new spikes (Brazil: high, Nigeria: medium)")
 
+        await rebuild_rollups(session)
         await session.commit()
         print("\nNew countries added successfully!")
         print("Countries now available: India, USA, Brazil, Nigeria, Germany, Indonesia, UK, Kenya, Philippines, Mexico")
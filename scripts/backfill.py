@@ -2,61 +2,128 @@
 """
 Backfill historical data from Telegram channels.
 
+History is fetched in date-range chunks whose progress is stored in the
+database; rerun with the same range to resume an interrupted backfill.
+
 Usage:
-    python scripts/backfill.py --limit 500  # Fetch 500 messages per channel
+    python scripts/backfill.py --since 2024-01-01                # Everything since Jan 1st
+    python scripts/backfill.py --since 2024-01-01 --until 2024-03-01 --chunk-days 3
+    python scripts/backfill.py --since 2024-01-01 --process      # Score chunks as they finish
 """
 
 import asyncio
 import argparse
 import sys
+from datetime import datetime, timedelta
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from config import config
 from database.connection import init_db
-from scraper.telegram_scraper import TelegramScraper
+from scraper.backfill import Backfiller
+from scraper.session_pool import SessionPool
 from processing.pipeline import ProcessingPipeline
 
 
+def parse_date(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+async def process_chunks(pipeline: ProcessingPipeline, chunk_done: asyncio.Event, backfill_done: asyncio.Event) -> int:
+    # Score what each finished chunk stored while the backfill carries on
+    total = 0
+    while True:
+        await chunk_done.wait()
+        chunk_done.clear()
+        total += await pipeline.process_all_unprocessed()
+        if backfill_done.is_set() and not chunk_done.is_set():
+            return total
+
+
 async def main():
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
     parser = argparse.ArgumentParser(description="Backfill historical data")
     parser.add_argument(
-        "--limit", "-l",
+        "--since",
+        type=parse_date,
+        default=today - timedelta(days=30),
+        help="First day to backfill, YYYY-MM-DD (default: 30 days ago)"
+    )
+    parser.add_argument(
+        "--until",
+        type=parse_date,
+        default=today + timedelta(days=1),
+        help="Day to stop before, YYYY-MM-DD (default: tomorrow)"
+    )
+    parser.add_argument(
+        "--chunk-days",
         type=int,
-        default=500,
-        help="Number of messages to fetch per channel (default: 500)"
+        default=7,
+        help="Days of history per chunk (default: 7)"
+    )
+    parser.add_argument(
+        "--concurrency", "-c",
+        type=int,
+        default=config.SCRAPE_CONCURRENCY,
+        help=f"Chunks fetched at the same time per session (default: {config.SCRAPE_CONCURRENCY})"
     )
     parser.add_argument(
         "--process", "-p",
         action="store_true",
-        help="Also process messages after scraping"
+        help="Also process messages as each chunk finishes"
     )
     args = parser.parse_args()
 
     await init_db()
     print("Database initialized")
 
-    scraper = TelegramScraper()
-    await scraper.start()
+    pool = SessionPool()
+    await pool.start()
+
+    chunk_done = asyncio.Event()
+    backfill_done = asyncio.Event()
+    backfillers = [
+        Backfiller(
+            scraper,
+            since=args.since,
+            until=args.until,
+            chunk_days=args.chunk_days,
+            concurrency=args.concurrency,
+            on_chunk_done=lambda chunk: chunk_done.set()
+        )
+        for scraper in pool.scrapers.values()
+    ]
 
     try:
-        print(f"\nBackfilling up to {args.limit} messages per channel...")
-        results = await scraper.scrape_all_channels(limit=args.limit)
-        total = sum(results.values())
+        print(f"\nBackfilling {args.since:%Y-%m-%d} to {args.until:%Y-%m-%d} in {args.chunk_days}-day chunks...")
+
+        processor = None
+        if args.process:
+            processor = asyncio.create_task(process_chunks(ProcessingPipeline(), chunk_done, backfill_done))
 
+        try:
+            results = {}
+            for result in await asyncio.gather(*(backfiller.run() for backfiller in backfillers)):
+                results.update(result)
+        finally:
+            backfill_done.set()
+            chunk_done.set()
+
+        total = sum(results.values())
         print(f"\nBackfill complete!")
         print(f"Total new messages: {total}")
         for channel, count in results.items():
             print(f"  {channel}: {count}")
 
-        if args.process and total > 0:
-            print("\nProcessing scraped messages...")
-            pipeline = ProcessingPipeline()
-            processed = await pipeline.process_all_unprocessed()
+        if processor:
+            print("\nFinishing processing of scraped messages...")
+            processed = await processor
             print(f"Processed {processed} messages")
 
     finally:
-        await scraper.stop()
+        await pool.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Rebuild the hourly rollups (post_hourly_rollups) from the posts table.
+
+The processor keeps the rollups up to date; a rebuild is only needed after
+posts were changed outside of it (manual edits, imports, restores).
+
+Usage:
+    python scripts/rebuild_rollups.py           # Rebuild everything
+    python scripts/rebuild_rollups.py --days 7  # Only the last 7 days
+"""
+
+import asyncio
+import argparse
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, select
+
+from database.connection import init_db, async_session
+from database.models import PostHourlyRollup
+from database.rollups import rebuild_rollups
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Rebuild the hourly rollups")
+    parser.add_argument(
+        "--days", "-d",
+        type=int,
+        default=None,
+        help="Only rebuild hours from this many days ago (default: all history)"
+    )
+    args = parser.parse_args()
+
+    await init_db()
+    print("Database initialized")
+
+    since = datetime.utcnow() - timedelta(days=args.days) if args.days else None
+
+    async with async_session() as session:
+        await rebuild_rollups(session, since=since)
+        await session.commit()
+
+        result = await session.execute(
+            select(func.count(), func.sum(PostHourlyRollup.post_count))
+        )
+        rows, posts = result.one()
+
+    print(f"\nRollups rebuilt: {rows} channel-hours covering {posts or 0} scored posts")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,6 +5,8 @@ Run the processing pipeline to score posts with Perspective API.
 Usage:
     python scripts/run_processor.py              # Process all unprocessed
     python scripts/run_processor.py --continuous # Run continuously
+    python scripts/run_processor.py -c --detect-spikes  # Also detect spikes as scores are written
+    python scripts/run_processor.py --status     # Show backlog size and age
 """
 
 import asyncio
@@ -14,8 +16,10 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from config import config
 from database.connection import init_db
 from processing.pipeline import ProcessingPipeline
+from analysis.online_detector import OnlineSpikeDetector
 
 
 async def main():
@@ -25,6 +29,11 @@ async def main():
         action="store_true",
         help="Run continuously"
     )
+    parser.add_argument(
+        "--status", "-s",
+        action="store_true",
+        help="Print backlog size and age, then exit"
+    )
     parser.add_argument(
         "--batch-size", "-b",
         type=int,
@@ -35,17 +44,38 @@ async def main():
         "--interval", "-i",
         type=int,
         default=30,
-        help="Interval in seconds for continuous mode (default: 30)"
+        help="Longest idle poll interval in seconds for continuous mode (default: 30)"
+    )
+    parser.add_argument(
+        "--detect-spikes", "-d",
+        action="store_true",
+        help="With --continuous, update spike alerts as each batch of scores is written"
+    )
+    parser.add_argument(
+        "--langdetect-workers", "-w",
+        type=int,
+        default=None,
+        help="Language detection processes, 0 to use a thread (default: LANGDETECT_WORKERS)"
     )
     args = parser.parse_args()
 
+    if args.langdetect_workers is not None:
+        config.LANGDETECT_WORKERS = args.langdetect_workers
+
     await init_db()
     print("Database initialized")
 
-    pipeline = ProcessingPipeline()
+    pipeline = ProcessingPipeline(
+        spike_detector=OnlineSpikeDetector() if args.detect_spikes and args.continuous else None
+    )
 
-    if args.continuous:
-        await pipeline.run_continuous(interval_seconds=args.interval)
+    if args.status:
+        stats = await pipeline.get_backlog_stats()
+        print(f"\nPending posts: {stats['pending']}")
+        print(f"Awaiting retry: {stats['retrying']}")
+        print(f"Oldest pending: {stats['oldest_scraped_at'] or 'n/a'} ({stats['age_seconds']:.0f}s old)")
+    elif args.continuous:
+        await pipeline.run_continuous(interval_seconds=args.interval, batch_size=args.batch_size)
     else:
         total = await pipeline.process_all_unprocessed(batch_size=args.batch_size)
         print(f"\nProcessing complete!")
@@ -5,6 +5,12 @@ Run the Telegram scraper.
 Usage:
     python scripts/run_scraper.py              # Run once
     python scripts/run_scraper.py --continuous # Run continuously
+    python scripts/run_scraper.py --realtime   # Ingest messages as they are posted
+    python scripts/run_scraper.py -c --session account2  # Run one session's shard only
+    python scripts/run_scraper.py -r --process # Also score new posts in this process
+
+Channels are split between the sessions in TELEGRAM_SESSIONS; without
+--session this process runs all of them.
 """
 
 import asyncio
@@ -15,7 +21,10 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from database.connection import init_db
-from scraper.telegram_scraper import TelegramScraper
+from scraper.realtime import RealtimeIngestor
+from scraper.session_pool import SessionPool
+from processing.pipeline import ProcessingPipeline
+from analysis.online_detector import OnlineSpikeDetector
 from config import config
 
 
@@ -24,40 +33,78 @@ async def main():
     parser.add_argument(
         "--continuous", "-c",
         action="store_true",
-        help="Run continuously with interval"
+        help="Poll channels continuously, more often the more active they are"
+    )
+    parser.add_argument(
+        "--realtime", "-r",
+        action="store_true",
+        help="Subscribe to new and edited messages instead of polling"
     )
     parser.add_argument(
         "--limit", "-l",
         type=int,
         default=100,
-        help="Number of messages to fetch per channel (default: 100)"
+        help="Messages to fetch per channel on its first scrape (default: 100)"
     )
     parser.add_argument(
         "--interval", "-i",
         type=int,
         default=config.SCRAPE_INTERVAL_MINUTES,
-        help=f"Interval in minutes for continuous mode (default: {config.SCRAPE_INTERVAL_MINUTES})"
+        help=f"Poll interval in minutes for channels with no activity history (default: {config.SCRAPE_INTERVAL_MINUTES})"
+    )
+    parser.add_argument(
+        "--session", "-s",
+        action="append",
+        help="Only run this session's shard of the channels (repeatable, default: all sessions)"
+    )
+    parser.add_argument(
+        "--process", "-p",
+        action="store_true",
+        help="With --continuous or --realtime, score new posts in this process as they are stored"
+    )
+    parser.add_argument(
+        "--detect-spikes", "-d",
+        action="store_true",
+        help="With --process, update spike alerts as each batch of scores is written"
     )
     args = parser.parse_args()
 
     await init_db()
     print("Database initialized")
 
-    scraper = TelegramScraper()
+    pool = SessionPool(owned=args.session)
+
+    if args.realtime or args.continuous:
+        tasks = []
+        if args.process:
+            # New posts go straight from the scrapers to the processor
+            handoff = asyncio.Queue(maxsize=config.HANDOFF_QUEUE_SIZE)
+            for scraper in pool.scrapers.values():
+                scraper.handoff = handoff
+            pipeline = ProcessingPipeline(spike_detector=OnlineSpikeDetector() if args.detect_spikes else None)
+            tasks.append(pipeline.run_continuous(handoff=handoff))
 
-    if args.continuous:
-        await scraper.run_continuous(interval_minutes=args.interval)
+        if args.realtime:
+            await pool.start()
+            tasks.extend(RealtimeIngestor(scraper).run() for scraper in pool.scrapers.values())
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                await pool.stop()
+        else:
+            await asyncio.gather(pool.run_continuous(interval_minutes=args.interval), *tasks)
     else:
-        await scraper.start()
+        await pool.start()
         try:
-            results = await scraper.scrape_all_channels(limit=args.limit)
+            results = await pool.scrape_all_channels(limit=args.limit)
             total = sum(results.values())
             print(f"\nScraping complete!")
             print(f"Total new messages: {total}")
             for channel, count in results.items():
                 print(f"  {channel}: {count}")
+            pool.log_stats()
         finally:
-            await scraper.stop()
+            await pool.stop()
 
 
 if __name__ == "__main__":
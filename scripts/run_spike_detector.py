@@ -4,9 +4,12 @@ Run spike detection to find unusual increases in hate speech.
 
 Usage:
     python scripts/run_spike_detector.py
+    python scripts/run_spike_detector.py --scan                      # Report what every detector flags
+    python scripts/run_spike_detector.py --scan -D zscore,cusum --scan-hours 24
 """
 
 import asyncio
+import argparse
 import sys
 from pathlib import Path
 
@@ -14,12 +17,58 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from database.connection import init_db
 from analysis.spike_detector import SpikeDetector
+from analysis.engine import DETECTORS, DetectionEngine
+
+
+async def scan(detectors: list[str], scan_hours: int):
+    engine = DetectionEngine(detectors=detectors)
+    flagged = await engine.run(scan_hours=scan_hours)
+
+    if not flagged:
+        print("\nNothing flagged")
+        return
+
+    print(f"\n{len(flagged)} flagged window(s):")
+    for result in sorted(flagged, key=lambda result: (result["window_end"], result["channel_id"], result["detector"])):
+        print(
+            f"  - Channel ID {result['channel_id']} {result['window_start']:%Y-%m-%d %H:%M} to "
+            f"{result['window_end']:%Y-%m-%d %H:%M}: {result['detector']} {result['score']:.2f} "
+            f"(avg {result['current_avg']:.3f} vs {result['baseline']:.3f}, {result['post_count']} posts)"
+        )
 
 
 async def main():
+    parser = argparse.ArgumentParser(description="Run spike detection")
+    parser.add_argument(
+        "--scan",
+        action="store_true",
+        help="Only report what the detection engine flags, without creating alerts"
+    )
+    parser.add_argument(
+        "--detectors", "-D",
+        default=",".join(DETECTORS),
+        help=f"With --scan, comma-separated detectors to run (default: {','.join(DETECTORS)})"
+    )
+    parser.add_argument(
+        "--scan-hours",
+        type=int,
+        default=1,
+        help="With --scan, number of hourly windows to evaluate, ending now (default: 1)"
+    )
+    args = parser.parse_args()
+
+    detectors = [name.strip() for name in args.detectors.split(",") if name.strip()]
+    unknown = set(detectors) - set(DETECTORS)
+    if unknown:
+        parser.error(f"unknown detectors: {', '.join(sorted(unknown))}")
+
     await init_db()
     print("Database initialized")
 
+    if args.scan:
+        await scan(detectors, args.scan_hours)
+        return
+
     detector = SpikeDetector()
 
     print("\nClosing inactive spikes...")
@@ -11,6 +11,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from database.connection import init_db, async_session
 from database.models import Channel, Post, Spike, SpikePost
+from database.rollups import rebuild_rollups
 
 
 async def seed_demo_data():
@@ -143,6 +144,7 @@ async def seed_demo_data():
 
         print(f"Created 1 demo spike with {min(50, len(high_tox_posts))} linked posts")
 
+        await rebuild_rollups(session)
         await session.commit()
         print("\nDemo data seeded successfully!")
         print("Refresh your dashboard at http://localhost:4000")